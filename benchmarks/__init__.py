@@ -0,0 +1,4 @@
+from .generators import GENERATORS
+from .harness import compare, discover_drawers, replay_case, run_grid
+
+__all__ = ["GENERATORS", "compare", "discover_drawers", "replay_case", "run_grid"]
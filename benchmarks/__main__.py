@@ -0,0 +1,84 @@
+import sys
+import json
+import argparse
+from pathlib import Path
+from .generators import GENERATORS
+from .harness import compare, discover_drawers, host_info, replay_case, run_grid
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark dos drawers do Secret Santa.")
+    parser.add_argument("--sizes", default="10,100,1000", help="Tamanhos separados por vírgula")
+    parser.add_argument("--generators", default=",".join(GENERATORS), help="Geradores separados por vírgula")
+    parser.add_argument("--drawers", default="", help="Drawers separados por vírgula (padrão: todos)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=5, help="Timeout repassado aos drawers que aceitam")
+    parser.add_argument("--output", type=Path, help="Salva os resultados em JSON")
+    parser.add_argument("--save-baseline", action="store_true", help="Sobrescreve o baseline com os resultados")
+    parser.add_argument("--check", action="store_true", help="Falha se houver regressão em relação ao baseline")
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--replay", metavar="DRAWER,GERADOR,N,SEMENTE_INSTANCIA,SEMENTE_SORTEIO",
+                        help="Refaz um único sorteio (ex.: o 'slowest' de um resultado salvo)")
+    args = parser.parse_args(argv)
+
+    drawers = discover_drawers()
+    if args.replay:
+        name, generator, n, instance_seed, draw_seed = args.replay.split(",")
+        cls = next(d for d in drawers if d.__name__ == name)
+        print(json.dumps(replay_case(cls, generator, int(n), int(instance_seed), int(draw_seed), args.timeout)))
+        return 0
+
+    if args.check:  # Antes de rodar: tempos de outra máquina não servem de referência
+        baseline = json.loads(BASELINE_PATH.read_text())
+        host = baseline.get("host") if isinstance(baseline, dict) else None
+        if host != host_info():
+            print(
+                f"Baseline gravado em outra máquina ({host}, esta: {host_info()}). "
+                "Rode make bench-baseline nesta máquina antes de comparar.",
+                file=sys.stderr,
+            )
+            return 2
+
+    if args.drawers:
+        wanted = set(args.drawers.split(","))
+        drawers = [d for d in drawers if d.__name__ in wanted]
+
+    def progress(row):
+        print(
+            f"{row['drawer']:<26} {row['generator']:<16} n={row['n']:<6} "
+            f"p50={row['p50_ms']:9.2f}ms p95={row['p95_ms']:9.2f}ms p99={row['p99_ms']:9.2f}ms "
+            f"sucesso={row['success_rate']:4.0%} pico={row['peak_memory_kb']:9.1f}KiB",
+            file=sys.stderr,
+        )
+
+    rows = run_grid(
+        sizes=[int(s) for s in args.sizes.split(",")],
+        generators=args.generators.split(","),
+        drawers=drawers,
+        repeats=args.repeats,
+        seed=args.seed,
+        timeout=args.timeout,
+        progress=progress,
+    )
+
+    if args.output:
+        args.output.write_text(json.dumps(rows, indent=2))
+
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps({"host": host_info(), "rows": rows}, indent=2) + "\n")
+
+    if args.check:
+        regressions = compare(rows, baseline["rows"], tolerance=args.tolerance)
+        for r in regressions:
+            print(f"REGRESSÃO: {r}", file=sys.stderr)
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
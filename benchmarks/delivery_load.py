@@ -0,0 +1,173 @@
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+import requests
+from pathlib import Path
+from typing import Dict, List
+from src.exceptions import CircuitOpenException
+from src.integration import AsyncWAHA, OutgoingMessage, Outbox, TransportMetrics, WAHA, WAHATransport, deliver_with_outbox
+from .fake_waha import FakeWAHA, FakeWAHAConfig
+from .harness import percentile
+
+# O que bring_up/stop_session podem levantar com o servidor fora do ar: viram uma linha com `error`
+SESSION_ERRORS = (CircuitOpenException, TimeoutError, requests.exceptions.RequestException)
+
+
+class TimedWAHA(WAHA):
+    """WAHA que mede cada send_msg de ponta a ponta (incluindo os retries do transporte)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.send_latencies: List[float] = []
+        self._latency_lock = threading.Lock()
+
+    def send_msg(self, phone_number, content):
+        start = time.perf_counter()
+        try:
+            return super().send_msg(phone_number, content)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._latency_lock:
+                self.send_latencies.append(elapsed)
+
+
+def bring_up(waha: WAHA, timeout: float = 30) -> None:
+    # Mesmo roteiro do app: cria a sessão, inicia, lê o QR code e espera ficar pronta para envio
+    status_code, _ = waha.create_session()
+    if status_code == 422:
+        waha.update_session()
+
+    waha.start_session()
+    if waha.wait_for_status({"SCAN_QR_CODE", "WORKING"}, timeout=timeout) == "SCAN_QR_CODE":
+        waha.authenticate()
+        waha.wait_for_status({"WORKING"}, timeout=timeout)
+
+
+def run_load(
+    n: int,
+    config: FakeWAHAConfig,
+    concurrency: int = 32,
+    rate: float = 1e6,
+    max_retries: int = 3,
+    backoff: float = 0.05,
+) -> Dict:
+    """Sobe um FakeWAHA, autentica a sessão e envia `n` mensagens pelo mesmo caminho do app (diário de
+    envios + AsyncWAHA + send_all). Retorna vazão, latências e retries; se a sessão não subir ou não parar,
+    a linha sai com `error` preenchido."""
+    metrics = TransportMetrics()
+    with FakeWAHA(config) as server, tempfile.TemporaryDirectory() as tmp:
+        base_url = f"http://{server.host}:{server.port}"
+        transport = WAHATransport(base_url, "fake", timeout=30, pool_size=concurrency, metrics=metrics, seed=config.seed)
+        waha = TimedWAHA("fake", server.host, server.port, transport=transport)
+        try:
+            bring_up(waha)
+        except SESSION_ERRORS as e:
+            waha.close()
+            return {"n": n, "delivered": 0, "failed": n, "duplicates": 0, "msgs_per_s": 0.0, "error": f"bring_up: {e}"}
+
+        server.reset_counters()
+        metrics.reset()
+
+        messages = [OutgoingMessage(f"p{i:05d}", f"5511{i:09d}", f"Mensagem {i}") for i in range(n)]
+        outbox = Outbox(str(Path(tmp) / "outbox.sqlite3"))
+
+        async def deliver():
+            async with AsyncWAHA(waha, max_workers=concurrency) as client:
+                return await deliver_with_outbox(
+                    outbox, "load", client, messages, description="load",
+                    concurrency=concurrency, rate=rate, max_retries=max_retries, backoff=backoff,
+                )
+
+        start = time.perf_counter()
+        report = asyncio.run(deliver())
+        elapsed = time.perf_counter() - start
+
+        error = None
+        try:
+            waha.stop_session()
+        except SESSION_ERRORS as e:
+            error = f"stop_session: {e}"
+        finally:
+            waha.close()
+
+        send = metrics.snapshot().get("/api/sendText", {})
+        delivered = sum(r.delivered for r in report)
+        latencies = waha.send_latencies or [0.0]
+        return {
+            "n": n,
+            "delivered": delivered,
+            "failed": n - delivered,
+            "seconds": round(elapsed, 3),
+            "msgs_per_s": round(delivered / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(max(latencies) * 1000, 2),
+            "transport_retries": send.get("retries", 0),  # 429/503 repetidos dentro do WAHATransport
+            "delivery_retries": sum(r.attempts - 1 for r in report),  # Novas tentativas do send_all
+            "http_requests": send.get("requests", 0),
+            "throttled": server.throttled,
+            "server_errors": server.errors,
+            "duplicates": len(server.sent) - len(set(server.sent)),  # Mesma mensagem aceita mais de uma vez
+            "error": error,
+        }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.delivery_load", description="Teste de carga da entrega via WAHA simulado.")
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="Números de destinatários separados por vírgula")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rate", type=float, default=1e6, help="Limite de envios/s do cliente")
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=0.05, help="Backoff base do send_all (s)")
+    parser.add_argument("--latency", type=float, default=0.005, help="Latência base do servidor (s)")
+    parser.add_argument("--jitter", type=float, default=0.005)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--accept-error-rate", type=float, default=0.0, help="Fração de envios aceitos que respondem erro")
+    parser.add_argument("--send-rate", type=float, help="Limite de /sendText por segundo do servidor (gera 429)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Salva os resultados em JSON")
+    parser.add_argument("--min-rate", type=float, default=0.0, help="Falha se a vazão ficar abaixo disso (msgs/s)")
+    args = parser.parse_args(argv)
+
+    config = FakeWAHAConfig(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, error_status=args.error_status,
+        accept_error_rate=args.accept_error_rate, send_rate=args.send_rate, seed=args.seed,
+    )
+
+    rows = []
+    for n in [int(s) for s in args.sizes.split(",")]:
+        row = run_load(n, config, args.concurrency, args.rate, args.max_retries, args.backoff)
+        rows.append(row)
+        if row["error"]:
+            print(f"n={row['n']:<6} erro: {row['error']}", file=sys.stderr)
+            continue
+
+        print(
+            f"n={row['n']:<6} {row['msgs_per_s']:9.1f} msgs/s p50={row['p50_ms']:8.2f}ms p95={row['p95_ms']:8.2f}ms "
+            f"p99={row['p99_ms']:8.2f}ms falhas={row['failed']:<4} retries={row['transport_retries']}+{row['delivery_retries']} "
+            f"429={row['throttled']}",
+            file=sys.stderr,
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(rows, indent=2))
+
+    failed = [r for r in rows if r["error"] or r["failed"] or r["duplicates"] or r["msgs_per_s"] < args.min_rate]
+    for r in failed:
+        print(
+            f"FALHA: n={r['n']} entregues={r['delivered']} duplicadas={r['duplicates']} vazão={r['msgs_per_s']}"
+            + (f" erro={r['error']}" if r["error"] else ""),
+            file=sys.stderr,
+        )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
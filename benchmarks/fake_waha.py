@@ -0,0 +1,266 @@
+import json
+import time
+import random
+import threading
+import urllib.request
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from src.integration.webhook import sign
+
+
+@dataclass
+class FakeWAHAConfig:
+    latency: float = 0.0  # Atraso base de cada resposta (s)
+    jitter: float = 0.0  # Atraso extra aleatório, uniforme entre 0 e jitter (s)
+    error_rate: float = 0.0  # Fração das requisições que falham com error_status
+    error_status: int = 500
+    accept_error_rate: float = 0.0  # Fração dos /sendText aceitos (mensagem registrada) que ainda assim respondem error_status
+    send_rate: Optional[float] = None  # Limite de /sendText por segundo; acima disso responde 429
+    send_burst: Optional[int] = None  # Rajada permitida pelo limite (padrão: 1 segundo de envios)
+    qr_delay: float = 0.0  # STARTING -> SCAN_QR_CODE
+    scan_delay: float = 0.0  # Após o QR ser lido (GET auth/qr) -> WORKING
+    seed: Optional[int] = None
+
+
+class FakeWAHA:
+    """Servidor local que imita a API do WAHA usada pelo cliente (sessões, start, status, auth/qr, sendText,
+    stop e logout), com latência, falhas, limite de envios (429 + Retry-After) e as transições de status da
+    sessão (STOPPED -> STARTING -> SCAN_QR_CODE -> WORKING). Serve para testar a entrega sem WhatsApp."""
+
+    def __init__(self, config: Optional[FakeWAHAConfig] = None, host: str = "127.0.0.1", port: int = 0, api_key: Optional[str] = None):
+        self.config = config or FakeWAHAConfig()
+        self._api_key = api_key
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Dict] = {}  # nome -> {"status", "config", "authenticated"}
+        self._timers: List[threading.Timer] = []
+        self._tokens = float(self._burst)
+        self._refilled = time.monotonic()
+        self.sent: List[Tuple[str, str]] = []  # (chatId, texto) de cada mensagem aceita
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive: o pool de conexões do cliente é exercitado de verdade
+            # Cabeçalhos e corpo saem em duas escritas; com Nagle + ACK atrasado cada resposta esperaria ~40 ms
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                fake._handle(self, "GET")
+
+            def do_POST(self):
+                fake._handle(self, "POST")
+
+            def do_PUT(self):
+                fake._handle(self, "PUT")
+
+            def log_message(self, *args):  # Silencia o log padrão do http.server
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+        self.host, self.port = self._server.server_address[:2]
+
+    @property
+    def _burst(self) -> int:
+        if self.config.send_rate is None:
+            return 0
+
+        return self.config.send_burst or max(1, int(self.config.send_rate))
+
+    def start(self) -> "FakeWAHA":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="fake-waha", daemon=True)
+            self._thread.start()
+
+        return self
+
+    def stop(self) -> None:
+        for timer in self._timers:
+            timer.cancel()
+
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread = None
+
+    def __enter__(self) -> "FakeWAHA":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def status(self, session: str = "default") -> Optional[str]:
+        with self._lock:
+            state = self._sessions.get(session)
+            return state["status"] if state else None
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.sent.clear()
+            self.requests = self.throttled = self.errors = 0
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        length = int(handler.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(handler.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            payload = {}
+
+        with self._lock:
+            self.requests += 1
+            delay = self.config.latency + (self._rng.uniform(0, self.config.jitter) if self.config.jitter else 0.0)
+            fail = self.config.error_rate and self._rng.random() < self.config.error_rate
+
+        if delay:
+            time.sleep(delay)
+
+        headers = {}
+        if self._api_key is not None and handler.headers.get("X-Api-Key") != self._api_key:
+            status, body = 401, {"message": "Unauthorized"}
+        elif fail:
+            with self._lock:
+                self.errors += 1
+            status, body = self.config.error_status, {"message": "Falha simulada"}
+        else:
+            status, body, headers = self._route(method, handler.path.split("?")[0].strip("/").split("/"), payload)
+
+        data = json.dumps(body).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _route(self, method: str, parts: List[str], payload: Dict) -> Tuple[int, Dict, Dict[str, str]]:
+        match method, parts:
+            case "POST", ["api", "sessions"]:
+                return self._create(payload.get("name", "default"), payload.get("config") or {})
+
+            case "PUT", ["api", "sessions", name]:
+                with self._lock:
+                    if name not in self._sessions:
+                        return 404, {"message": "Sessão não encontrada"}, {}
+                    self._sessions[name]["config"] = payload.get("config") or {}
+                return 200, {"name": name}, {}
+
+            case "GET", ["api", "sessions", name]:
+                with self._lock:
+                    state = self._sessions.get(name)
+                    if state is None:
+                        return 404, {"message": "Sessão não encontrada"}, {}
+                    return 200, {"name": name, "status": state["status"]}, {}
+
+            case "POST", ["api", "sessions", name, "start"]:
+                return self._start(name)
+
+            case "POST", ["api", "sessions", name, ("stop" | "logout") as action]:
+                with self._lock:
+                    state = self._sessions.get(name)
+                    if state is None:
+                        return 404, {"message": "Sessão não encontrada"}, {}
+                    if action == "logout":
+                        state["authenticated"] = False
+                self._set_status(name, "STOPPED")
+                return 201, {"name": name, "status": "STOPPED"}, {}
+
+            case "GET", ["api", name, "auth", "qr"]:
+                return self._qr(name)
+
+            case "POST", ["api", "sendText"]:
+                return self._send(payload)
+
+        return 404, {"message": "Rota não encontrada"}, {}
+
+    def _create(self, name: str, config: Dict) -> Tuple[int, Dict, Dict[str, str]]:
+        with self._lock:
+            if name in self._sessions:
+                return 422, {"message": f"Sessão '{name}' já existe"}, {}
+            self._sessions[name] = {"status": "STOPPED", "config": config, "authenticated": False}
+        return 201, {"name": name, "status": "STOPPED"}, {}
+
+    def _start(self, name: str) -> Tuple[int, Dict, Dict[str, str]]:
+        with self._lock:
+            state = self._sessions.setdefault(name, {"status": "STOPPED", "config": {}, "authenticated": False})
+            authenticated = state["authenticated"]
+
+        self._set_status(name, "STARTING")
+        self._after(self.config.qr_delay, name, "STARTING", "WORKING" if authenticated else "SCAN_QR_CODE")
+        return 201, {"name": name, "status": "STARTING"}, {}
+
+    def _qr(self, name: str) -> Tuple[int, Dict, Dict[str, str]]:
+        with self._lock:
+            state = self._sessions.get(name)
+            if state is None or state["status"] != "SCAN_QR_CODE":
+                return 422, {"message": "Sessão não está aguardando o QR code"}, {}
+            state["authenticated"] = True  # Simula a leitura do QR logo após ele ser exibido
+
+        self._after(self.config.scan_delay, name, "SCAN_QR_CODE", "WORKING")
+        return 200, {"mimetype": "image/png", "data": "iVBORw0KGgo="}, {}
+
+    def _send(self, payload: Dict) -> Tuple[int, Dict, Dict[str, str]]:
+        name = payload.get("session", "default")
+        with self._lock:
+            state = self._sessions.get(name)
+            if state is None or state["status"] != "WORKING":
+                return 422, {"message": f"Sessão '{name}' não está em WORKING"}, {}
+
+            if self.config.send_rate is not None:  # Balde de fichas: acima da taxa devolve 429 com Retry-After
+                now = time.monotonic()
+                self._tokens = min(self._burst, self._tokens + (now - self._refilled) * self.config.send_rate)
+                self._refilled = now
+                if self._tokens < 1:
+                    self.throttled += 1
+                    wait = (1 - self._tokens) / self.config.send_rate
+                    return 429, {"message": "Too Many Requests"}, {"Retry-After": f"{wait:.3f}"}
+                self._tokens -= 1
+
+            self.sent.append((payload.get("chatId"), payload.get("text")))
+            message_id = len(self.sent)
+            if self.config.accept_error_rate and self._rng.random() < self.config.accept_error_rate:
+                # Mensagem já aceita, mas a resposta diz que falhou: quem repetir o envio gera duplicata
+                self.errors += 1
+                return self.config.error_status, {"message": "Falha simulada após aceitar"}, {}
+
+        return 201, {"id": f"true_{payload.get('chatId')}_{message_id}"}, {}
+
+    def _after(self, delay: float, name: str, expected: str, status: str) -> None:
+        # Transição atrasada; só acontece se a sessão ainda estiver no status esperado (stop/logout cancelam)
+        def transition():
+            if self.status(name) == expected:
+                self._set_status(name, status)
+
+        if delay <= 0:
+            transition()
+            return
+
+        timer = threading.Timer(delay, transition)
+        timer.daemon = True
+        self._timers.append(timer)
+        timer.start()
+
+    def _set_status(self, name: str, status: str) -> None:
+        with self._lock:
+            state = self._sessions[name]
+            state["status"] = status
+            webhooks = [w for w in state["config"].get("webhooks", []) if "session.status" in w.get("events", [])]
+
+        for webhook in webhooks:  # Mesmo formato de evento (e assinatura) do WAHA
+            event = json.dumps({"event": "session.status", "session": name, "payload": {"status": status}}).encode()
+            headers = {"Content-Type": "application/json"}
+            key = (webhook.get("hmac") or {}).get("key")
+            if key:
+                headers.update({"X-Webhook-Hmac": sign(key, event), "X-Webhook-Hmac-Algorithm": "sha512"})
+
+            request = urllib.request.Request(webhook["url"], data=event, headers=headers)
+            try:
+                urllib.request.urlopen(request, timeout=5).close()
+            except OSError:
+                pass
@@ -0,0 +1,95 @@
+import random
+from typing import Callable, Dict, List, Set, Tuple
+from src.domain import GroupRestrictions, Restrictions
+
+Instance = Tuple[List[str], Restrictions]
+
+
+def _names(n: int) -> List[str]:
+    return [f"p{i:05d}" for i in range(n)]
+
+
+def _from_groups(names: List[str], groups: List[List[str]]) -> Dict[str, Set[str]]:
+    # Ninguém tira alguém do próprio grupo (nem a si mesmo)
+    restrictions = {p: {p} for p in names}
+    for group in groups:
+        members = set(group)
+        for p in group:
+            restrictions[p] |= members
+
+    return restrictions
+
+
+def _couples(names: List[str], rng: random.Random) -> List[List[str]]:
+    shuffled = rng.sample(names, len(names))
+    return [shuffled[i:i + 2] for i in range(0, len(names), 2)]
+
+
+def _group_model(names: List[str], groups: List[List[str]]) -> GroupRestrictions:
+    return GroupRestrictions(names, {f"g{i}": group for i, group in enumerate(groups)})
+
+
+def couples(n: int, rng: random.Random) -> Instance:
+    names = _names(n)
+    return names, _group_model(names, _couples(names, rng))
+
+
+def families(n: int, rng: random.Random, max_size: int = 6) -> Instance:
+    names = _names(n)
+    shuffled = rng.sample(names, n)
+
+    groups = []
+    i = 0
+    while i < n:
+        size = rng.randint(2, max_size)
+        groups.append(shuffled[i:i + size])
+        i += size
+
+    return names, _group_model(names, groups)
+
+
+def departments(n: int, rng: random.Random, n_departments: int = 0) -> Instance:
+    names = _names(n)
+    n_departments = n_departments or max(3, n // 50)
+    groups = [[] for _ in range(n_departments)]
+    for p in names:
+        groups[rng.randrange(n_departments)].append(p)
+
+    # Casais entre departamentos diferentes também não podem se tirar
+    return names, _group_model(names, groups + _couples(names, rng))
+
+
+def random_density(n: int, rng: random.Random, density: float = 0.3) -> Instance:
+    names = _names(n)
+    restrictions = {p: {p} for p in names}
+    for p in names:
+        restrictions[p] |= {q for q in rng.sample(names, int(density * (n - 1)))}
+
+    return names, restrictions
+
+
+def near_infeasible(n: int, rng: random.Random) -> Instance:
+    # Duas metades que só podem tirar a outra metade (grafo bipartido), com mais restrições aleatórias:
+    # qualquer ciclo precisa alternar entre as metades e há pouquíssima folga
+    names = _names(n)
+    half = n // 2
+    groups = [names[:half], names[half:2 * half]]
+    restrictions = _from_groups(names, groups)
+    if n % 2:
+        restrictions[names[-1]] |= set(names[:half])  # O participante extra só pode tirar a segunda metade
+
+    for p in names:
+        others = [q for q in names if q not in restrictions[p]]
+        extra = rng.sample(others, max(0, len(others) // 2 - 1))
+        restrictions[p] |= set(extra)
+
+    return names, restrictions
+
+
+GENERATORS: Dict[str, Callable[[int, random.Random], Instance]] = {
+    "couples": couples,
+    "families": families,
+    "departments": departments,
+    "random_density": random_density,
+    "near_infeasible": near_infeasible,
+}
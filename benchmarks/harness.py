@@ -0,0 +1,182 @@
+import gc
+import os
+import time
+import inspect
+import random
+import platform
+import statistics
+import tracemalloc
+from typing import Dict, List, Optional, Sequence, Type
+from src.drawers import BaseDrawer
+from src.drawers.stats import COUNTERS
+from src.exceptions import DrawException
+from .generators import GENERATORS
+
+def discover_drawers() -> List[Type[BaseDrawer]]:
+    found = []
+    pending = list(BaseDrawer.__subclasses__())
+    while pending:
+        cls = pending.pop(0)
+        pending.extend(cls.__subclasses__())
+        if not inspect.isabstract(cls) and cls not in found:
+            found.append(cls)
+
+    return sorted(found, key=lambda c: c.__name__)
+
+
+def build_drawer(cls: Type[BaseDrawer], timeout: Optional[float] = None, seed: Optional[int] = None,
+                 options: Optional[Dict] = None) -> BaseDrawer:
+    kwargs = {**(options or {}), "seed": seed}
+    parameters = inspect.signature(cls.__init__).parameters
+    if timeout is not None and "timeout" in parameters:
+        kwargs["timeout"] = timeout
+
+    if "max_workers" in parameters:  # Um processo só: o resultado não pode depender de quantos núcleos a máquina tem
+        kwargs["max_workers"] = 1
+
+    return cls(**kwargs)
+
+
+def host_info() -> Dict:
+    """Identifica a máquina de um baseline: tempos de máquinas diferentes não são comparáveis."""
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+
+    return {
+        "cpu": cpu,
+        "cpu_count": os.cpu_count(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "python": f"{platform.python_implementation()} {platform.python_version()}",
+    }
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def run_case(cls: Type[BaseDrawer], generator: str, n: int, repeats: int, seed: int = 0,
+             timeout: Optional[float] = None) -> Dict:
+    latencies = []
+    successes = 0
+    counters = {c: [] for c in COUNTERS}
+    slowest = None  # Sementes da repetição mais lenta, para reproduzir com replay_case
+
+    for r in range(repeats):
+        participants, restrictions = GENERATORS[generator](n, random.Random(seed + r))
+        drawer = build_drawer(cls, timeout)
+
+        gc.collect()
+        start = time.perf_counter()
+        try:
+            drawer.draw(participants, restrictions)
+            successes += 1
+        except DrawException:
+            pass
+
+        latencies.append(time.perf_counter() - start)
+        if slowest is None or latencies[-1] * 1000 > slowest["ms"]:
+            slowest = {"instance_seed": seed + r, "draw_seed": drawer.last_seed, "ms": latencies[-1] * 1000}
+
+        for c in COUNTERS:
+            if hasattr(drawer, c):
+                counters[c].append(getattr(drawer, c))
+
+    # Memória medida em uma execução à parte: o tracemalloc distorce os tempos
+    participants, restrictions = GENERATORS[generator](n, random.Random(seed))
+    drawer = build_drawer(cls, timeout)
+    tracemalloc.start()
+    try:
+        drawer.draw(participants, restrictions)
+    except DrawException:
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    row = {
+        "drawer": cls.__name__,
+        "generator": generator,
+        "n": n,
+        "repeats": repeats,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "success_rate": successes / repeats,
+        "peak_memory_kb": peak / 1024,
+        "slowest": slowest,
+    }
+    for c, values in counters.items():
+        if values:
+            row[f"mean_{c}"] = statistics.fmean(values)
+
+    return row
+
+
+def replay_case(cls: Type[BaseDrawer], generator: str, n: int, instance_seed: int, draw_seed: int,
+                timeout: Optional[float] = None) -> Dict:
+    """Refaz exatamente um sorteio (mesma instância e mesma semente do drawer), ex.: o `slowest` de um run_case."""
+    participants, restrictions = GENERATORS[generator](n, random.Random(instance_seed))
+    drawer = build_drawer(cls, timeout, seed=draw_seed)
+
+    start = time.perf_counter()
+    try:
+        drawer.draw(participants, restrictions)
+        outcome = "ok"
+    except DrawException as e:
+        outcome = type(e).__name__
+
+    row = {"drawer": cls.__name__, "generator": generator, "n": n, "ms": (time.perf_counter() - start) * 1000, "outcome": outcome}
+    for c in COUNTERS:
+        if hasattr(drawer, c):
+            row[c] = getattr(drawer, c)
+
+    return row
+
+
+def run_grid(
+    sizes: Sequence[int],
+    generators: Optional[Sequence[str]] = None,
+    drawers: Optional[Sequence[Type[BaseDrawer]]] = None,
+    repeats: int = 5,
+    seed: int = 0,
+    timeout: Optional[float] = None,
+    progress=None,
+) -> List[Dict]:
+    rows = []
+    for cls in drawers or discover_drawers():
+        for generator in generators or GENERATORS:
+            for n in sizes:
+                row = run_case(cls, generator, n, repeats, seed, timeout)
+                rows.append(row)
+                if progress is not None:
+                    progress(row)
+
+    return rows
+
+
+def compare(rows: List[Dict], baseline: List[Dict], tolerance: float = 1.5, min_ms: float = 5.0) -> List[str]:
+    """Lista as regressões em relação ao baseline: p95 acima de `tolerance` vezes o anterior (ignorando
+    casos abaixo de `min_ms`, dominados por ruído) ou queda na taxa de sucesso. Casos sem linha no baseline
+    (ex.: drawer novo) também entram, senão passariam sem comparação nenhuma."""
+    previous = {(b["drawer"], b["generator"], b["n"]): b for b in baseline}
+    regressions = []
+    for row in rows:
+        case = f"{row['drawer']}/{row['generator']}/n={row['n']}"
+        base = previous.get((row["drawer"], row["generator"], row["n"]))
+        if base is None:
+            regressions.append(f"{case}: sem baseline (rode make bench-baseline)")
+            continue
+
+        if row["p95_ms"] > max(base["p95_ms"] * tolerance, min_ms):
+            regressions.append(f"{case}: p95 {base['p95_ms']:.1f}ms -> {row['p95_ms']:.1f}ms")
+
+        if row["success_rate"] < base["success_rate"]:
+            regressions.append(f"{case}: sucesso {base['success_rate']:.0%} -> {row['success_rate']:.0%}")
+
+    return regressions
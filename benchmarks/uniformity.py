@@ -0,0 +1,201 @@
+import sys
+import json
+import math
+import time
+import random
+import argparse
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+from src.domain import RestrictionGraph
+from src.drawers import BaseDrawer, DFSDrawer, LasVegasDrawer, MatchingDrawer, MCMCDrawer, VectorizedLasVegasDrawer
+from src.drawers.compiled import iter_bits
+from src.exceptions import DrawException
+from .generators import GENERATORS
+from .harness import build_drawer, percentile
+
+# (rótulo, classe, opções). O portfólio fica de fora: só repete as estratégias abaixo em outros processos
+VARIANTS: List[Tuple[str, Type[BaseDrawer], Dict]] = [
+    ("LasVegasDrawer", LasVegasDrawer, {}),
+    ("VectorizedLasVegasDrawer", VectorizedLasVegasDrawer, {}),
+    ("MatchingDrawer", MatchingDrawer, {}),
+    ("MCMCDrawer", MCMCDrawer, {}),
+    ("DFSDrawer", DFSDrawer, {}),
+    ("MCMCDrawer(cycle)", MCMCDrawer, {"cycle": True}),
+]
+
+
+def make_drawer(cls: Type[BaseDrawer], options: Dict, timeout: Optional[float] = None, seed: Optional[int] = None) -> BaseDrawer:
+    return build_drawer(cls, timeout, seed, options)
+
+
+def enumerate_draws(allowed: Sequence[int], cycle: bool) -> List[Tuple[int, ...]]:
+    """Todos os sorteios válidos (vetores de sucessores), por busca exaustiva. Só para N pequeno."""
+    n = len(allowed)
+    successors = [-1] * n
+    found = []
+
+    def single_cycle() -> bool:
+        cur, length = successors[0], 1
+        while cur != 0:
+            cur, length = successors[cur], length + 1
+
+        return length == n
+
+    def search(i: int, free: int):
+        if i == n:
+            if not cycle or single_cycle():
+                found.append(tuple(successors))
+            return
+
+        for j in iter_bits(allowed[i] & free):
+            successors[i] = j
+            search(i + 1, free & ~(1 << j))
+
+        successors[i] = -1
+
+    search(0, (1 << n) - 1)
+    return found
+
+
+def chi2_pvalue(statistic: float, df: int) -> float:
+    # Aproximação de Wilson-Hilferty (boa para df >= 3): evita depender do scipy
+    if df <= 0:
+        return 1.0
+
+    z = ((statistic / df) ** (1 / 3) - (1 - 2 / (9 * df))) / math.sqrt(2 / (9 * df))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def bias_row(label: str, outcomes: Sequence[Tuple[int, ...]], support: Sequence[Tuple[int, ...]], seconds: float) -> Dict:
+    counts = Counter(outcomes)
+    samples = len(outcomes)
+    expected = samples / len(support)
+    statistic = sum((counts.get(s, 0) - expected) ** 2 / expected for s in support)
+    frequencies = [counts.get(s, 0) / samples for s in support]
+    return {
+        "drawer": label,
+        "valid_draws": len(support),
+        "samples": samples,
+        "coverage": sum(1 for s in support if counts.get(s)) / len(support),  # Fração dos sorteios que apareceu
+        "tv_distance": 0.5 * sum(abs(f - 1 / len(support)) for f in frequencies),  # 0 = uniforme
+        "max_ratio": max(frequencies) * len(support),  # Quantas vezes o mais frequente supera o esperado
+        "chi2": statistic,
+        "p_value": chi2_pvalue(statistic, len(support) - 1),
+        "ms_per_sample": seconds * 1000 / samples,
+    }
+
+
+def measure_bias(generator: str = "near_infeasible", n: int = 7, samples: int = 5000, seed: int = 0,
+                 variants: Sequence[Tuple[str, Type[BaseDrawer], Dict]] = VARIANTS) -> List[Dict]:
+    """Compara a frequência de cada sorteio possível com a uniforme, em uma instância pequena o bastante para
+    enumerar todos. Cada drawer é comparado com o seu universo (ciclo único ou qualquer atribuição) e a
+    primeira linha de cada universo é um amostrador uniforme exato, a referência do ruído amostral."""
+    participants, restrictions = GENERATORS[generator](n, random.Random(seed))
+    graph = RestrictionGraph(participants, restrictions)  # Compilado uma vez para todas as amostras
+    allowed = graph.compiled_for(graph.participants).allowed
+    index = {p: i for i, p in enumerate(graph.participants)}
+
+    rows = []
+    for cycle in (False, True):
+        support = enumerate_draws(allowed, cycle)
+        if not support:
+            continue
+
+        rng = random.Random(seed)
+        rows.append(bias_row("uniforme (referência)" + (" (ciclo)" if cycle else ""), [rng.choice(support) for _ in range(samples)], support, 0.0))
+
+        for label, cls, options in variants:
+            if make_drawer(cls, options).requires_cycle != cycle:
+                continue
+
+            outcomes = []
+            start = time.perf_counter()
+            for s in range(samples):
+                try:
+                    result = make_drawer(cls, options, seed=seed + s).draw(graph.participants, graph)
+                except DrawException:
+                    continue
+
+                outcomes.append(tuple(index[result[p]] for p in graph.participants))
+
+            if outcomes:
+                rows.append(bias_row(label, outcomes, support, time.perf_counter() - start))
+
+    return rows
+
+
+def measure_time(generator: str, sizes: Sequence[int], repeats: int = 5, seed: int = 0, timeout: Optional[float] = 5,
+                 variants: Sequence[Tuple[str, Type[BaseDrawer], Dict]] = VARIANTS) -> List[Dict]:
+    """Tempo por amostra (p50/p95) de cada drawer em instâncias grandes, onde não dá para enumerar."""
+    rows = []
+    for n in sizes:
+        participants, restrictions = GENERATORS[generator](n, random.Random(seed))
+        graph = RestrictionGraph(participants, restrictions)
+        for label, cls, options in variants:
+            latencies, failures, steps = [], 0, []
+            for r in range(repeats):
+                drawer = make_drawer(cls, options, timeout, seed=seed + r)
+                start = time.perf_counter()
+                try:
+                    drawer.draw(graph.participants, graph)
+                except DrawException:
+                    failures += 1
+                latencies.append(time.perf_counter() - start)
+                if hasattr(drawer, "steps"):
+                    steps.append(drawer.steps)
+
+            row = {
+                "drawer": label,
+                "generator": generator,
+                "n": n,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "success_rate": 1 - failures / repeats,
+            }
+            if steps:
+                row["mean_steps"] = sum(steps) / len(steps)
+
+            rows.append(row)
+
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.uniformity", description="Viés e tempo por amostra dos drawers.")
+    parser.add_argument("--generator", default="near_infeasible", choices=list(GENERATORS), help="Instância do teste de viés")
+    parser.add_argument("--n", type=int, default=7, help="Tamanho da instância do teste de viés (enumerada por completo)")
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--sizes", default="100,1000", help="Tamanhos do teste de tempo separados por vírgula")
+    parser.add_argument("--time-generator", default="random_density", choices=list(GENERATORS))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Salva os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    bias = measure_bias(args.generator, args.n, args.samples, args.seed)
+    for row in bias:
+        print(
+            f"{row['drawer']:<28} sorteios={row['valid_draws']:<5} cobertura={row['coverage']:5.0%} "
+            f"TV={row['tv_distance']:.3f} máx/esperado={row['max_ratio']:5.2f} p={row['p_value']:.3g} "
+            f"{row['ms_per_sample']:7.3f}ms/amostra",
+            file=sys.stderr,
+        )
+
+    timing = measure_time(args.time_generator, [int(s) for s in args.sizes.split(",")], args.repeats, args.seed, args.timeout)
+    for row in timing:
+        print(
+            f"{row['drawer']:<28} {row['generator']:<16} n={row['n']:<6} p50={row['p50_ms']:9.2f}ms "
+            f"p95={row['p95_ms']:9.2f}ms sucesso={row['success_rate']:4.0%}",
+            file=sys.stderr,
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps({"bias": bias, "time": timing}, indent=2))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,17 @@
-import time
 import os
 import base64
+import secrets
+import asyncio
+import uuid
+import pandas as pd  # Já vem com o streamlit
 import streamlit as st
-from typing import Any, Optional, Dict, Tuple
+from typing import Optional, Dict, List, Tuple
 from dotenv import load_dotenv
-from src import SecretSanta, BaseDrawer, DFSDrawer, LasVegasDrawer, WAHA
+from src.domain import GroupRestrictions, RestrictionGraph
+from src.domain.roster import COLUMNS as ROSTER_COLUMNS, Roster, parse_roster_text, restrictions_from_groups, validate_roster
+from src import SecretSanta, DFSDrawer, LasVegasDrawer, MatchingDrawer, MCMCDrawer, PortfolioDrawer, VectorizedLasVegasDrawer, WAHA
+from src.exceptions import DrawException, InfeasibleRestrictionsException
+from src.integration import AsyncWAHA, DeliveryResult, OutgoingMessage, Outbox, WebhookReceiver, deliver_with_outbox
 
 def initialize_states():
     if "show_participants" not in st.session_state:
@@ -28,11 +35,44 @@ def initialize_states():
     if "waha_initialized" not in st.session_state:
         st.session_state.waha_initialized = False
 
-    if "messages_sent" not in st.session_state:
-        st.session_state.messages_sent = False
+    if "sent_draw_id" not in st.session_state:
+        st.session_state.sent_draw_id = None  # Último sorteio cujos resultados foram enviados
 
+    if "draw_id" not in st.session_state:
+        st.session_state.draw_id = None
 
-def render_header() -> Tuple[int, bool, str]:
+    if "resume_draw_id" not in st.session_state:
+        st.session_state.resume_draw_id = None
+
+    if "draw_inputs" not in st.session_state:
+        st.session_state.draw_inputs = None  # Entradas congeladas no "Finalizar sorteio"
+
+    if "draw_cache" not in st.session_state:
+        st.session_state.draw_cache = None  # (draw_id, SecretSanta ou exceção): o sorteio sobrevive aos reruns
+
+    if "waha" not in st.session_state:
+        st.session_state.waha = None  # Cliente criado uma vez por sessão (reaproveita conexões e estado)
+
+
+@st.cache_resource
+def get_outbox() -> Outbox:
+    return Outbox(os.environ.get("OUTBOX_PATH", "outbox.sqlite3"))
+
+
+def render_pending_outbox():
+    pending = get_outbox().pending_draws()
+    if not pending:
+        return
+
+    with st.expander("⚠️ Existem envios interrompidos de sorteios anteriores", expanded=True):
+        for draw_id, description, count in pending:
+            col1, col2 = st.columns([0.69, 0.31], vertical_alignment="center")
+            col1.write(f"**{description}**: {count} mensagem(ns) pendente(s)")
+            if col2.button("Retomar envio", key=f"resume_{draw_id}", use_container_width=True):
+                st.session_state.resume_draw_id = draw_id
+
+
+def render_header() -> Tuple[int, bool, str, bool]:
     st.write("# 🎅🏻 Secret Santa")
 
     ss_desc = st.text_input(
@@ -41,11 +81,17 @@ def render_header() -> Tuple[int, bool, str]:
     if ss_desc is None:
         ss_desc = "Amigo Secreto"
 
+    bulk_mode = st.radio(
+        "Forma de cadastro", options=["Individual", "Em massa (CSV)"], horizontal=True
+    ) == "Em massa (CSV)"
+    if bulk_mode:
+        return 0, False, ss_desc, bulk_mode
+
     col1, col2 = st.columns([0.69, 0.31], vertical_alignment="bottom")
     num_participants = col1.number_input("Número de participantes", min_value=2)
     clicked_generate_list = col2.button("Gerar lista de participantes", key="base_list")
 
-    return num_participants, clicked_generate_list, ss_desc
+    return num_participants, clicked_generate_list, ss_desc, bulk_mode
 
 
 def handle_header(num_participants: int):
@@ -152,8 +198,13 @@ def render_restrictions_form() -> bool:
             else:
                 st.write(f"{p} não pode tirar {restrictions}")
 
+    return render_drawer_select()
+
+
+def render_drawer_select() -> bool:
     st.session_state.drawer = st.selectbox("Selecione a forma de sorteio", 
-                                           options=["Algoritmo de Las Vegas", "DFS"])
+                                           options=["Emparelhamento (Hopcroft-Karp)", "Automático (portfólio)", "Algoritmo de Las Vegas",
+                                                    "Las Vegas vetorizado (NumPy)", "DFS", "Uniforme (MCMC)"])
 
     st.write("Se estiver tudo correto, clique abaixo para gerar os arquivos.")
     clicked_generate_secret_santa = st.button(
@@ -163,7 +214,90 @@ def render_restrictions_form() -> bool:
     return clicked_generate_secret_santa
 
 
-def handle_restrictions_form():
+@st.cache_data(max_entries=8)
+def parse_bulk_text(text: str) -> List[Dict[str, str]]:
+    return parse_roster_text(text)
+
+
+@st.cache_data(max_entries=8)
+def validate_bulk_rows(rows: Tuple[Tuple[str, str, str], ...]) -> Roster:
+    return validate_roster([dict(zip(ROSTER_COLUMNS, r)) for r in rows])
+
+
+def render_bulk_form() -> Tuple[bool, Roster]:
+    # Um único data_editor para todos os participantes: o tamanho da página cresce linearmente com N
+    st.write("## 📋 Participantes e restrições (em massa)")
+    st.info(
+        """Importe um CSV ou cole a planilha com as colunas **nome**, **telefone** e **grupos**.
+            Pessoas de um mesmo grupo (família, casal, departamento...) não tiram umas às outras.
+            Vários grupos para a mesma pessoa devem ser separados por `|`."""
+    )
+
+    uploaded = st.file_uploader("Arquivo CSV", type=["csv", "txt", "tsv"])
+    pasted = st.text_area("Ou cole aqui", placeholder="nome,telefone,grupos\nFulano da Silva,551140028922,familia silva|ti")
+    text = uploaded.getvalue().decode("utf-8-sig") if uploaded is not None else pasted
+
+    # Sem linhas, o editor ainda precisa das colunas, e como texto (colunas vazias viriam como float)
+    rows = st.data_editor(
+        parse_bulk_text(text) or pd.DataFrame({c: pd.Series(dtype="string") for c in ROSTER_COLUMNS}),
+        num_rows="dynamic",
+        use_container_width=True,
+        column_config={
+            "nome": st.column_config.TextColumn("Nome", required=True),
+            "telefone": st.column_config.TextColumn("Telefone"),
+            "grupos": st.column_config.TextColumn("Grupos (separados por |)"),
+        },
+        key="bulk_editor",
+    )
+    if isinstance(rows, pd.DataFrame):  # O editor devolve no mesmo formato que recebeu
+        rows = rows.astype(object).where(rows.notna(), None).to_dict("records")
+
+    roster = validate_bulk_rows(
+        tuple(tuple((r.get(c) or "") for c in ROSTER_COLUMNS) for r in rows)
+    )
+
+    with st.expander("_Sumário das restrições_"):
+        st.write(f"{len(roster.names)} participante(s) em {len(roster.groups)} grupo(s).")
+        st.dataframe(
+            [{"Grupo": g, "Membros": len(m)} for g, m in roster.groups.items()],
+            use_container_width=True,
+        )
+
+    return render_drawer_select(), roster
+
+
+def finalize_draw(ss_desc: str):
+    # Congela as entradas: mexer nos campos depois de finalizar não altera (nem refaz) este sorteio
+    restrictions = st.session_state.restrictions
+    st.session_state.draw_id = uuid.uuid4().hex  # Identifica o sorteio no diário de envios
+    st.session_state.draw_inputs = {
+        "participants": [dict(p) for p in st.session_state.participants],
+        "restrictions": restrictions.copy() if isinstance(restrictions, GroupRestrictions) else {p: list(r) for p, r in restrictions.items()},
+        "drawer": st.session_state.drawer,
+        "description": ss_desc,
+    }
+    st.session_state.enable_res_generation = True
+
+
+def handle_bulk_form(roster: Roster, ss_desc: str):
+    st.session_state.enable_res_generation = False  # Começa por padrão considerando que não vai
+
+    if len(roster.names) < 2:
+        st.error("Informe pelo menos dois participantes.")
+        return
+
+    if roster.errors:
+        st.error("Corrija os problemas abaixo para avançar:\n\n" + "\n".join(f"- {e}" for e in roster.errors))
+        return
+
+    st.session_state.participants = [
+        {"name": n, "phone": p} for n, p in zip(roster.names, roster.phones)
+    ]
+    st.session_state.restrictions = restrictions_from_groups(roster.names, roster.groups)
+    finalize_draw(ss_desc)
+
+
+def handle_restrictions_form(ss_desc: str):
     st.session_state.enable_res_generation = False  # Começa por padrão considerando que não vai
 
     if all(
@@ -171,7 +305,7 @@ def handle_restrictions_form():
         < len(st.session_state.participants)
         for p in st.session_state.participants
     ):
-        st.session_state.enable_res_generation = True
+        finalize_draw(ss_desc)
 
     else:
         st.error(
@@ -179,42 +313,101 @@ def handle_restrictions_form():
         )
 
 
-def get_drawer():
-    match st.session_state.drawer:
+def get_drawer(name: str):
+    match name:
+        case "Automático (portfólio)":
+            return PortfolioDrawer()
+
         case "Algoritmo de Las Vegas":
             return LasVegasDrawer()
+
+        case "Las Vegas vetorizado (NumPy)":
+            return VectorizedLasVegasDrawer()
         
         case "DFS":
             return DFSDrawer()
+
+        case "Emparelhamento (Hopcroft-Karp)":
+            return MatchingDrawer()
+
+        case "Uniforme (MCMC)":
+            return MCMCDrawer()
         
         case _:
-            raise NotImplementedError("O algoritmo de sorteio deve ser um dentre Las Vegas e DFS.")
+            raise NotImplementedError("O algoritmo de sorteio deve ser um dentre Automático, Las Vegas, DFS, Emparelhamento e MCMC.")
 
 
-def generate_res(drawer: BaseDrawer, ss_desc: str) -> Optional[SecretSanta]:
-    participants = [p["name"] for p in st.session_state.participants]
-    restrictions = {p: set(r) | {p} for p, r in st.session_state.restrictions.items()}
+def generate_res() -> Optional[SecretSanta]:
+    inputs = st.session_state.draw_inputs
+    participants = [p["name"] for p in inputs["participants"]]
+    restrictions = inputs["restrictions"]
+    if not isinstance(restrictions, GroupRestrictions):  # Cadastro individual: listas escolhidas na tela
+        restrictions = {p: set(r) | {p} for p, r in restrictions.items()}
 
-    ss = SecretSanta(participants, restrictions, drawer, description=ss_desc)
-    with st.spinner("🎲 Gerando sorteio..."):
-        try:
-            _ = ss.draw()
-            st.success("✅ Sorteio finalizado com sucesso!")
-            return ss
+    # Chave é só o draw_id: as entradas foram congeladas ao finalizar, então reruns reaproveitam o mesmo sorteio
+    key = st.session_state.draw_id
+    cached = st.session_state.draw_cache
+    if cached is None or cached[0] != key:
+        with st.spinner("🎲 Gerando sorteio..."):
+            try:
+                graph = RestrictionGraph(participants, restrictions)  # Validado uma vez e compartilhado sem cópias
+                ss = SecretSanta(participants, graph, get_drawer(inputs["drawer"]), description=inputs["description"])
+                _ = ss.draw()
+                cached = (key, ss)
+            except DrawException as e:  # A falha também fica guardada: sem refazer um sorteio de até 30 s a cada clique
+                cached = (key, e)
+
+        st.session_state.draw_cache = cached
+
+    result = cached[1]
+    if isinstance(result, SecretSanta):
+        st.success("✅ Sorteio finalizado com sucesso!")
+        return result
+
+    if isinstance(result, InfeasibleRestrictionsException):
+        st.error(
+            f"As restrições tornam o sorteio impossível: {result}\n\n"
+            f"Revise as restrições de: **{', '.join(result.conflict)}**."
+        )
+    else:
+        st.error(
+            "Não foi possível gerar o sorteio em tempo hábil. É possível que exista uma restrição impossível de ser resolvida. Tente novamente."
+        )
+
+
+@st.cache_resource
+def get_webhook_receiver() -> Optional[WebhookReceiver]:
+    # Sem URL pública configurada o WAHA não tem como nos chamar: fica só o polling
+    public_url = os.environ.get("WAHA_WEBHOOK_URL")
+    if not public_url:
+        return None
+
+    # Chave nova a cada processo: vai para o WAHA na configuração da sessão, que passa a assinar os eventos
+    return WebhookReceiver(
+        host=os.environ.get("WAHA_WEBHOOK_HOST", "127.0.0.1"),
+        port=int(os.environ.get("WAHA_WEBHOOK_PORT", 8502)),
+        public_url=public_url,
+        hmac_key=secrets.token_hex(32),
+    ).start()
+
+
+def get_waha() -> WAHA:
+    if st.session_state.waha is None:
+        st.session_state.waha = WAHA(
+            session_name="default",
+            host="waha",  # Vide docker-compose
+            api_port=os.environ.get("WHATSAPP_API_PORT"),
+            api_key=os.environ.get("WAHA_API_KEY"),
+            events=get_webhook_receiver(),
+        )
+
+    return st.session_state.waha
 
-        except TimeoutError:
-            st.error(
-                "Não foi possível gerar o sorteio em tempo hábil. É possível que exista uma restrição impossível de ser resolvida. Tente novamente."
-            )
-    
 
 def render_waha_start() -> WAHA:
-    waha = WAHA(
-        session_name="default",
-        host="waha",  # Vide docker-compose
-        api_port=os.environ.get("WHATSAPP_API_PORT"),
-        api_key=os.environ.get("WAHA_API_KEY"),
-    )
+    waha = get_waha()
+    if st.session_state.waha_initialized:  # Já autenticado nesta sessão
+        return waha
 
     start_waha_placeholder = st.empty()
     start_waha = start_waha_placeholder.button(
@@ -262,21 +455,18 @@ def initialize_waha(waha: WAHA, timeout: int = 120):
     except Exception:
         pass
 
-    waha.create_session()
+    status_code, _ = waha.create_session()
+    if status_code == 422:  # Sessão já existe: só atualiza a configuração (webhook)
+        waha.update_session()
+
     waha.start_session()
-    _, session_status_content = waha.get_session_status()
-
-    status = session_status_content.get("status", "STARTING")
-    start_time = time.monotonic()
-    while status != "SCAN_QR_CODE":
-        if time.monotonic() - start_time > timeout:
-            raise TimeoutError(
-                f"Execução durou mais do que o esperado! Necessário reiniciar o processo."
-            )
 
-        time.sleep(1)
-        _, session_status_content = waha.get_session_status()
-        status = session_status_content.get("status", "STARTING")
+    try:
+        waha.wait_for_status({"SCAN_QR_CODE"}, timeout=timeout)
+    except TimeoutError:
+        raise TimeoutError(
+            f"Execução durou mais do que o esperado! Necessário reiniciar o processo."
+        )
 
 
 def get_qr_code_bytes(waha: WAHA) -> bytes:
@@ -287,50 +477,88 @@ def get_qr_code_bytes(waha: WAHA) -> bytes:
 
 
 def wait_authentication(waha: WAHA, timeout: int = 120):
-    _, session_status_content = waha.get_session_status()
-    status = session_status_content.get("status", "SCAN_QR_CODE")
-
-    start_time = time.monotonic()
-    while status != "WORKING":
-        if time.monotonic() - start_time > timeout:
-            raise TimeoutError(
-                f"Autenticação demorou mais do que esperado! Necessário reiniciar o processo."
-            )
+    try:
+        waha.wait_for_status({"WORKING"}, timeout=timeout)
+    except TimeoutError:
+        raise TimeoutError(
+            f"Autenticação demorou mais do que esperado! Necessário reiniciar o processo."
+        )
 
-        time.sleep(1)
-        _, session_status_content = waha.get_session_status()
-        status = session_status_content.get("status", "SCAN_QR_CODE")
 
+def send_messages(
+    ss: SecretSanta,
+    waha: WAHA,
+    description: str,
+    max_retries: int = 3,
+    concurrency: int = 8,
+    rate: float = 5.0,
+):
+    messages = [
+        OutgoingMessage(p["name"], p["phone"], format_secret_santa_message(p["name"], ss.get_result(p["name"]), description))
+        for p in st.session_state.draw_inputs["participants"]
+    ]
+    deliver_and_report(waha, st.session_state.draw_id, messages, description, max_retries, concurrency, rate)
+
+
+def resume_messages(waha: WAHA, draw_id: str, max_retries: int = 3, concurrency: int = 8, rate: float = 5.0):
+    # Reenvia só o que ficou pendente no diário (mesmo conteúdo de antes, sem novo sorteio)
+    deliver_and_report(waha, draw_id, None, "", max_retries, concurrency, rate)
+
+
+def deliver_and_report(
+    waha: WAHA,
+    draw_id: str,
+    messages: Optional[List[OutgoingMessage]],
+    description: str,
+    max_retries: int,
+    concurrency: int,
+    rate: float,
+):
+    outbox = get_outbox()
+    texts = {m.recipient: m.text for m in (messages if messages is not None else outbox.pending(draw_id))}
 
-def send_messages(ss: SecretSanta, waha: WAHA, description: str, max_retries: int = 3):
     with st.spinner('📩 Enviando resultados...'):
-        for p in st.session_state.participants:
-            name = p["name"]
-            phone = p["phone"]
-
-            result = ss.get_result(name)
-
-            msg = format_secret_santa_message(name, result, description)
-            success = False
+        report = asyncio.run(
+            deliver_messages(outbox, waha, draw_id, messages, description, max_retries, concurrency, rate)
+        )
 
-            for attempt in range(max_retries + 1):
-                status_code, _ = waha.send_msg(phone, msg)
+    for res in report:
+        if not res.delivered:
+            masked = base64.b64encode(texts[res.recipient].encode()).decode()
+            st.error(
+                f"Houve um erro ao enviar a mensagem para {res.recipient} ({res.phone}).<br>"
+                f"**Resultado mascarado**: {masked}"
+            )
 
-                if status_code == 201:
-                    success = True
-                    break
+    with st.expander("Relatório de envio"):
+        st.dataframe(
+            [
+                {"Participante": r.recipient, "Entregue": r.delivered, "Tentativas": r.attempts,
+                 "Status": r.status_code, "Tempo (s)": round(r.elapsed, 2)}
+                for r in report
+            ],
+            use_container_width=True,
+        )
 
-                time.sleep(5 * attempt)  # Backoff para retry
+    st.session_state.sent_draw_id = draw_id
+    st.success("✅ Resultados enviados com sucesso!")
 
-            if not success:
-                masked = base64.b64encode(msg.encode()).decode()
-                st.error(
-                    f"Houve um erro ao enviar a mensagem para {name} ({phone}).<br>"
-                    f"**Resultado mascarado**: {masked}"
-                )
 
-    st.session_state.messages_sent = True
-    st.success("✅ Resultados enviados com sucesso!")
+async def deliver_messages(
+    outbox: Outbox,
+    waha: WAHA,
+    draw_id: str,
+    messages: Optional[List[OutgoingMessage]],
+    description: str,
+    max_retries: int,
+    concurrency: int,
+    rate: float,
+) -> List[DeliveryResult]:
+    async with AsyncWAHA(waha, max_workers=concurrency) as client:
+        return await deliver_with_outbox(
+            outbox, draw_id, client, messages, description=description,
+            concurrency=concurrency, rate=rate, max_retries=max_retries,
+        )
 
 
 def format_secret_santa_message(
@@ -348,7 +576,7 @@ def render_audit_res(ss: SecretSanta):
     b64_general_res = base64.b64encode(repr(ss).encode()).decode()
     b64_participants_res = {}
 
-    participants = [p["name"] for p in st.session_state.participants]
+    participants = ss.participants
     for p in participants:
         p_res = ss.get_result(p)
         base_msg = f"{p}, você tirou {p_res} no sorteio."
@@ -371,7 +599,9 @@ def terminate(waha: WAHA):
                 waha.logout_session()
             except Exception:
                 pass
-            
+
+            waha.close()  # Fecha as conexões do pool
+
         st.session_state.clear()
         initialize_states()
         st.rerun()
@@ -381,8 +611,34 @@ def main():
     # Inicializa estados (necessário para poder trabalhar com múltiplos botoões)
     initialize_states()
 
+    # Envios interrompidos (ex.: sessão caiu no meio) podem ser retomados sem novo sorteio
+    if st.session_state.resume_draw_id is None:
+        render_pending_outbox()
+
+    if st.session_state.resume_draw_id is not None:
+        waha = render_waha_start()
+        sent = st.session_state.sent_draw_id == st.session_state.resume_draw_id
+        if st.session_state.waha_initialized and not sent:
+            resume_messages(waha, st.session_state.resume_draw_id)
+
+        if st.session_state.sent_draw_id == st.session_state.resume_draw_id:
+            terminate(waha)
+
+        return
+
     # Entrada de número de participantes
-    num_participants, clicked_generate_list, ss_desc = render_header()
+    num_participants, clicked_generate_list, ss_desc, bulk_mode = render_header()
+
+    if bulk_mode:
+        clicked_generate_secret_santa, roster = render_bulk_form()
+
+        if clicked_generate_secret_santa:
+            handle_bulk_form(roster, ss_desc)
+
+        if st.session_state.enable_res_generation:
+            render_results()
+
+        return
 
     # Quando clicar no primeiro botão
     if clicked_generate_list:
@@ -400,21 +656,30 @@ def main():
             clicked_generate_secret_santa = render_restrictions_form()
 
             if clicked_generate_secret_santa:
-                handle_restrictions_form()
+                handle_restrictions_form(ss_desc)
 
             if st.session_state.enable_res_generation:
-                # Se for para enviar os resultados via WhatsApp (descontinuado formato de arquivos)
-                drawer = get_drawer()
-                ss = generate_res(drawer, ss_desc)
-                waha = render_waha_start()
-
-                if st.session_state.waha_initialized and waha is not None:
-                    send_messages(ss, waha, ss_desc)
-                    render_audit_res(ss)
-                    
-                if st.session_state.messages_sent:
-                    terminate(waha)
+                render_results()
+
+
+def render_results():
+    # Se for para enviar os resultados via WhatsApp (descontinuado formato de arquivos)
+    ss = generate_res()  # Mesmo sorteio em todos os reruns: o que é enviado bate com a auditoria
+    if ss is None:
+        return
+
+    waha = render_waha_start()
+
+    # Comparado com o draw_id atual: um novo "Finalizar sorteio" gera um sorteio que ainda precisa ser enviado
+    sent = st.session_state.sent_draw_id == st.session_state.draw_id
+    if st.session_state.waha_initialized:
+        if not sent:
+            send_messages(ss, waha, st.session_state.draw_inputs["description"])
+
+        render_audit_res(ss)
 
+    if st.session_state.sent_draw_id == st.session_state.draw_id:
+        terminate(waha)
 
 if __name__ == "__main__":
     load_dotenv()
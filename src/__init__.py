@@ -1,5 +1,5 @@
-from .domain import SecretSanta
-from .drawers import BaseDrawer, DFSDrawer, LasVegasDrawer
+from .domain import Assignment, GroupRestrictions, RestrictionGraph, SecretSanta
+from .drawers import BaseDrawer, DFSDrawer, LasVegasDrawer, MatchingDrawer, MCMCDrawer, PortfolioDrawer, VectorizedLasVegasDrawer
 from .integration import WAHA
 
-__all__ = ["SecretSanta", "BaseDrawer", "DFSDrawer", "LasVegasDrawer", "WAHA"]
+__all__ = ["SecretSanta", "Assignment", "GroupRestrictions", "RestrictionGraph", "BaseDrawer", "DFSDrawer", "LasVegasDrawer", "MatchingDrawer", "MCMCDrawer", "PortfolioDrawer", "VectorizedLasVegasDrawer", "WAHA"]
@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import time
+import inspect
+import argparse
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple, Type
+from .domain import GroupRestrictions, Restrictions, SecretSanta
+from .drawers import BaseDrawer, DFSDrawer, LasVegasDrawer, MatchingDrawer, MCMCDrawer, PortfolioDrawer, VectorizedLasVegasDrawer
+
+DRAWERS: Dict[str, Type[BaseDrawer]] = {
+    "las_vegas": LasVegasDrawer,
+    "vectorized": VectorizedLasVegasDrawer,
+    "dfs": DFSDrawer,
+    "matching": MatchingDrawer,
+    "mcmc": MCMCDrawer,
+    "portfolio": PortfolioDrawer,
+}
+
+
+def _is_names(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(p, str) for p in value)
+
+
+def check_event_shape(event: Dict) -> None:
+    """Confere os tipos de `participants`, `restrictions`, `groups` e `pairs` antes de usá-los."""
+    if not _is_names(event.get("participants")):
+        raise ValueError("'participants' deve ser uma lista de nomes.")
+
+    groups = event.get("groups")
+    if groups is not None and not (isinstance(groups, dict) and all(_is_names(m) for m in groups.values())):
+        raise ValueError("'groups' deve ser um objeto (nome do grupo -> lista de participantes).")
+
+    pairs = event.get("pairs")
+    if pairs is not None and not (isinstance(pairs, list) and all(_is_names(p) and len(p) == 2 for p in pairs)):
+        raise ValueError("'pairs' deve ser uma lista de pares [quem, quem].")
+
+    restrictions = event.get("restrictions")
+    if restrictions is not None and not (isinstance(restrictions, dict) and all(_is_names(r) for r in restrictions.values())):
+        raise ValueError("'restrictions' deve ser um objeto (participante -> lista de quem não pode tirar).")
+
+    unknown = set(restrictions or {}) - set(event["participants"])
+    if unknown:  # Seriam ignoradas sem aviso
+        raise ValueError(f"'restrictions' tem chaves que não são participantes: {', '.join(sorted(unknown))}")
+
+
+def build_restrictions(event: Dict) -> Restrictions:
+    """Aceita `restrictions` (quem -> lista de quem não pode tirar) ou `groups`/`pairs` (modelo por grupos)."""
+    check_event_shape(event)
+    participants = event["participants"]
+    if "groups" in event or "pairs" in event:
+        return GroupRestrictions(participants, event.get("groups"), [tuple(p) for p in event.get("pairs") or []])
+
+    restrictions = event.get("restrictions") or {}
+    return {p: set(restrictions.get(p, [])) | {p} for p in participants}  # Igual à tela: sempre inclui a si mesmo
+
+
+def build_drawer(name: str, options: Optional[Dict] = None, timeout: Optional[float] = None) -> BaseDrawer:
+    if name not in DRAWERS:
+        raise ValueError(f"Drawer desconhecido: '{name}'. Opções: {', '.join(DRAWERS)}")
+
+    options = dict(options or {})
+    if timeout is not None and "timeout" in inspect.signature(DRAWERS[name].__init__).parameters:
+        options.setdefault("timeout", timeout)
+
+    return DRAWERS[name](**options)
+
+
+def run_event(line: int, event: Dict, default_drawer: str, timeout: Optional[float]) -> Dict:
+    # Roda dentro do processo do pool: recebe e devolve apenas dados simples (serializáveis)
+    out = {"line": line, "id": event.get("id", line)}
+    start = time.perf_counter()
+    try:
+        ss = SecretSanta(
+            event["participants"],
+            build_restrictions(event),
+            build_drawer(event.get("drawer", default_drawer), event.get("options"), timeout),
+            description=event.get("description", "Amigo Secreto"),
+            gifts_per_person=event.get("gifts_per_person", 1),
+        )
+        ss.draw()
+        rounds = [r.to_dict() for r in ss.rounds]
+        out.update(ok=True, results=rounds[0] if len(rounds) == 1 else rounds)
+    except Exception as e:  # Evento inválido, impossível ou com erro inesperado não derruba o lote
+        out.update(ok=False, error_type=type(e).__name__, error=str(e))
+
+    out["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return out
+
+
+def read_events(stream: IO[str]) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    # Lê sob demanda: o arquivo nunca é carregado inteiro na memória
+    for line, raw in enumerate(stream, start=1):
+        raw = raw.strip()
+        if not raw:
+            continue
+
+        try:
+            event = json.loads(raw)
+        except json.JSONDecodeError as e:
+            yield line, None, f"JSON inválido: {e}"
+            continue
+
+        if not isinstance(event, dict) or not isinstance(event.get("participants"), list):
+            yield line, None, "Evento deve ser um objeto com a lista 'participants'."
+            continue
+
+        yield line, event, None
+
+
+class Throughput:
+    """Estatísticas acumuladas do lote (contagens e latências dos sorteios)."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.ok = 0
+        self.failed = 0
+        self.latencies: List[float] = []
+
+    def add(self, record: Dict) -> None:
+        if record["ok"]:
+            self.ok += 1
+        else:
+            self.failed += 1
+
+        if "elapsed_ms" in record:
+            self.latencies.append(record["elapsed_ms"])
+
+    def summary(self) -> Dict:
+        wall = time.perf_counter() - self.start
+        total = self.ok + self.failed
+        ordered = sorted(self.latencies)
+
+        def pct(q: float) -> float:
+            return ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))] if ordered else 0.0
+
+        return {
+            "events": total,
+            "ok": self.ok,
+            "failed": self.failed,
+            "wall_s": round(wall, 3),
+            "draws_per_s": round(total / wall, 2) if wall else 0.0,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "max_ms": ordered[-1] if ordered else 0.0,
+        }
+
+
+def run_batch(
+    events: Iterator[Tuple[int, Optional[Dict], Optional[str]]],
+    output: IO[str],
+    workers: Optional[int] = None,
+    drawer: str = "las_vegas",
+    timeout: Optional[float] = None,
+) -> Dict:
+    """Distribui os eventos em um pool de processos e escreve cada resultado (JSONL) assim que termina.
+    No máximo 2 x `workers` eventos ficam em voo, então a memória não cresce com o tamanho do arquivo."""
+    workers = workers or os.cpu_count() or 1
+    stats = Throughput()
+
+    def emit(record: Dict) -> None:
+        stats.add(record)
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output.flush()
+
+    def collect(f: Future, line: int, event_id: Any) -> None:
+        try:
+            emit(f.result())
+        except Exception as e:  # Falha do próprio pool (ex.: processo morto): vira uma linha com erro
+            emit({"line": line, "id": event_id, "ok": False, "error_type": type(e).__name__, "error": str(e)})
+
+    in_flight: Dict[Future, Tuple[int, Any]] = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for line, event, error in events:
+            if error is not None:
+                emit({"line": line, "id": line, "ok": False, "error_type": "ParseError", "error": error})
+                continue
+
+            if len(in_flight) >= 2 * workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for f in done:
+                    collect(f, *in_flight.pop(f))
+
+            in_flight[pool.submit(run_event, line, event, drawer, timeout)] = (line, event.get("id", line))
+
+        for f in wait(in_flight).done:
+            collect(f, *in_flight[f])
+
+    return stats.summary()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.batch", description="Roda vários sorteios a partir de um arquivo JSONL.")
+    parser.add_argument("input", help="Arquivo JSONL com um evento por linha ('-' para stdin)")
+    parser.add_argument("--output", "-o", default="-", help="Arquivo JSONL de saída ('-' para stdout)")
+    parser.add_argument("--workers", "-j", type=int, default=None, help="Processos em paralelo (padrão: nº de CPUs)")
+    parser.add_argument("--drawer", default="las_vegas", choices=list(DRAWERS), help="Drawer dos eventos que não informam um")
+    parser.add_argument("--timeout", type=float, default=None, help="Timeout por sorteio (drawers que aceitam)")
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        summary = run_batch(read_events(src), dst, args.workers, args.drawer, args.timeout)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+
+    print(
+        f"{summary['events']} sorteios ({summary['ok']} ok, {summary['failed']} com falha) em {summary['wall_s']:.2f}s: "
+        f"{summary['draws_per_s']:.1f} sorteios/s, p50={summary['p50_ms']:.1f}ms p95={summary['p95_ms']:.1f}ms "
+        f"máx={summary['max_ms']:.1f}ms",
+        file=sys.stderr,
+    )
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
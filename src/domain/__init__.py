@@ -1,3 +1,5 @@
+from .assignment import Assignment
+from .restrictions import GroupRestrictions, RestrictionGraph, Restrictions
 from .secret_santa import SecretSanta
 
-__all__ = ["SecretSanta"]
+__all__ = ["Assignment", "GroupRestrictions", "RestrictionGraph", "Restrictions", "SecretSanta"]
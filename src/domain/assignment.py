@@ -0,0 +1,100 @@
+import csv
+import json
+from collections.abc import Mapping
+from typing import IO, Dict, Iterator, List, Optional, Sequence
+
+
+class Assignment(Mapping):
+    """Resultado do sorteio (quem tirou quem) guardado como um vetor de permutação sobre os índices dos
+    participantes. Funciona como um dicionário somente leitura (doador -> sorteado), responde "quem tirou
+    X?" em O(1) e exporta/relata em streaming, sem montar cópias intermediárias."""
+
+    __slots__ = ("_names", "_index", "_successors", "_predecessors")
+
+    def __init__(self, names: Sequence[str], successors: Sequence[int], index: Optional[Dict[str, int]] = None) -> None:
+        self._names = tuple(names)
+        self._index = index if index is not None else {p: i for i, p in enumerate(self._names)}  # Pode ser compartilhado
+        self._successors = tuple(successors)
+
+        predecessors = [-1] * len(self._names)
+        for i, j in enumerate(self._successors):
+            predecessors[j] = i
+        self._predecessors = tuple(predecessors)
+
+    @classmethod
+    def from_dict(cls, results: Dict[str, str]) -> "Assignment":
+        names = list(results)
+        index = {p: i for i, p in enumerate(names)}
+        return cls(names, [index[results[p]] for p in names], index)
+
+    def __getitem__(self, giver: str) -> str:
+        return self._names[self._successors[self._index[giver]]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, giver) -> bool:
+        return giver in self._index
+
+    def __repr__(self):
+        return f"Assignment({len(self._names)} participantes)"
+
+    def __reduce__(self):  # Sem o índice compartilhado: é reconstruído do outro lado
+        return type(self), (self._names, self._successors)
+
+    @property
+    def successors(self) -> Sequence[int]:
+        return self._successors
+
+    def giver_of(self, receiver: str) -> str:
+        """Quem tirou `receiver`."""
+        return self._names[self._predecessors[self._index[receiver]]]
+
+    def cycles(self) -> List[List[str]]:
+        # Cada ciclo na ordem em que os presentes são dados (a -> b -> c -> a)
+        seen = [False] * len(self._names)
+        cycles = []
+        for start in range(len(self._names)):
+            if seen[start]:
+                continue
+
+            cycle = []
+            cur = start
+            while not seen[cur]:
+                seen[cur] = True
+                cycle.append(self._names[cur])
+                cur = self._successors[cur]
+            cycles.append(cycle)
+
+        return cycles
+
+    def to_dict(self) -> Dict[str, str]:
+        names = self._names
+        return {names[i]: names[j] for i, j in enumerate(self._successors)}
+
+    def write_csv(self, fp: IO[str], header: bool = True) -> None:
+        writer = csv.writer(fp)
+        if header:
+            writer.writerow(("participante", "tirou"))
+
+        names = self._names
+        for i, j in enumerate(self._successors):
+            writer.writerow((names[i], names[j]))
+
+    def iter_jsonl(self) -> Iterator[str]:
+        names = self._names
+        for i, j in enumerate(self._successors):
+            yield json.dumps({"participante": names[i], "tirou": names[j]}, ensure_ascii=False) + "\n"
+
+    def write_jsonl(self, fp: IO[str]) -> None:
+        fp.writelines(self.iter_jsonl())
+
+    def iter_report(self) -> Iterator[str]:
+        # Uma linha por participante, em ordem alfabética (mesmo formato do relatório do SecretSanta)
+        names = self._names
+        for i in sorted(range(len(names)), key=names.__getitem__):
+            p = names[i]
+            yield f'{p} {(15-len(p))*"-"}> {names[self._successors[i]]}\n'
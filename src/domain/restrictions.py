@@ -0,0 +1,266 @@
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple, Union
+from ..exceptions import InfeasibleRestrictionsException, InvalidRestrictionsException
+
+
+class GroupRestrictions:
+    """Restrições descritas por grupos (departamentos, famílias, casais...): ninguém tira alguém com quem
+    divide um grupo, nem a si mesmo. Bloqueios individuais complementam os grupos. Guardamos só quem está
+    em cada grupo, então a memória cresce com N (e não com N²) e "A pode tirar B?" sai em O(1)."""
+
+    def __init__(
+        self,
+        participants: Iterable[str],
+        groups: Optional[Dict[str, Iterable[str]]] = None,
+        pairs: Iterable[Tuple[str, str]] = (),
+    ) -> None:
+        self._participants = list(participants)
+        self._member_of: Dict[str, Set[int]] = {p: set() for p in self._participants}  # Ids dos grupos de cada um
+        self._groups: List[Tuple[str, List[str]]] = []
+        self._forbidden: Dict[str, Set[str]] = {}  # Bloqueios individuais (quem -> quem não pode tirar)
+
+        for name, members in (groups or {}).items():
+            self.add_group(name, members)
+
+        for a, b in pairs:
+            self.forbid_pair(a, b)
+
+    def __repr__(self):
+        return f"GroupRestrictions({len(self._participants)} participantes, {len(self._groups)} grupos)"
+
+    def __len__(self) -> int:
+        return len(self._participants)
+
+    def __contains__(self, participant: str) -> bool:
+        return participant in self._member_of
+
+    @classmethod
+    def from_dict(cls, restrictions: Dict[str, Set[str]]) -> "GroupRestrictions":
+        # Formato antigo (quem -> conjunto de quem não pode tirar) vira bloqueios individuais
+        model = cls(restrictions.keys())
+        for p, blocked in restrictions.items():
+            for q in blocked:
+                if q != p:
+                    model.forbid(p, q)
+
+        return model
+
+    @property
+    def participants(self) -> List[str]:
+        return self._participants.copy()
+
+    @property
+    def groups(self) -> Dict[str, List[str]]:
+        return {name: members.copy() for name, members in self._groups}
+
+    @property
+    def forbidden(self) -> Dict[str, Set[str]]:
+        return {p: set(q) for p, q in self._forbidden.items()}
+
+    def _check(self, participant: str) -> None:
+        if participant not in self._member_of:
+            raise InvalidRestrictionsException(f"'{participant}' não existe nos participantes.")
+
+    def add_group(self, name: str, members: Iterable[str]) -> None:
+        members = list(dict.fromkeys(members))  # Sem repetidos, mantendo a ordem
+        for p in members:
+            self._check(p)
+
+        group_id = len(self._groups)
+        self._groups.append((name, members))
+        for p in members:
+            self._member_of[p].add(group_id)
+
+    def forbid(self, giver: str, receiver: str) -> None:
+        self._check(giver)
+        self._check(receiver)
+        self._forbidden.setdefault(giver, set()).add(receiver)
+
+    def forbid_pair(self, a: str, b: str) -> None:
+        self.forbid(a, b)
+        self.forbid(b, a)
+
+    def may_draw(self, giver: str, receiver: str) -> bool:
+        if giver == receiver:
+            return False
+
+        if receiver in self._forbidden.get(giver, ()):
+            return False
+
+        return self._member_of[giver].isdisjoint(self._member_of[receiver])
+
+    def groups_of(self, participant: str) -> List[str]:
+        return [self._groups[g][0] for g in sorted(self._member_of[participant])]
+
+    def group_members(self) -> Iterable[Tuple[str, List[str]]]:
+        return iter(self._groups)  # Sem cópia: uso interno dos drawers (somente leitura)
+
+    def blocked(self, participant: str) -> Set[str]:
+        """Conjunto de quem `participant` não pode tirar (inclui ele mesmo), no formato antigo."""
+        blocked = {participant} | self._forbidden.get(participant, set())
+        for g in self._member_of[participant]:
+            blocked.update(self._groups[g][1])
+
+        return blocked
+
+    def to_dict(self) -> Dict[str, Set[str]]:
+        # Materializa O(N²) no pior caso: apenas para exibição/compatibilidade
+        return {p: self.blocked(p) for p in self._participants}
+
+    def copy(self) -> "GroupRestrictions":
+        # Já validado: copia direto as estruturas internas (linear em N)
+        model = GroupRestrictions(())
+        model._participants = self._participants.copy()
+        model._member_of = {p: set(g) for p, g in self._member_of.items()}
+        model._groups = [(name, members.copy()) for name, members in self._groups]
+        model._forbidden = {p: set(q) for p, q in self._forbidden.items()}
+        return model
+
+
+class RestrictionGraph:
+    """Grafo de "quem pode tirar quem", imutável e validado uma única vez na construção. Guarda a forma
+    compilada (bitmasks) e dados derivados, e pode ser compartilhado por referência entre a tela, o
+    SecretSanta e os drawers, sem cópias nem revalidação a cada sorteio. É hashable: grafos com os mesmos
+    participantes (na mesma ordem) e os mesmos pares permitidos são iguais."""
+
+    __slots__ = ("_participants", "_compiled", "_hash", "_degrees", "_in_degrees", "_allowed_pairs", "_feasibility", "_blocked")
+
+    def __init__(self, participants: Iterable[str], restrictions: "Restrictions") -> None:
+        from ..drawers.compiled import CompiledRestrictions  # Import tardio: os drawers dependem deste módulo
+        from ..drawers.validation import validate_compiled, validate_restrictions
+
+        if isinstance(restrictions, RestrictionGraph):
+            raise TypeError("As restrições já são um RestrictionGraph: use-o diretamente.")
+
+        participants = tuple(participants)
+        validate_restrictions(list(participants), restrictions)
+        compiled = CompiledRestrictions(list(participants), restrictions)
+        validate_compiled(compiled)
+        self._set_state(participants, compiled.with_masks(tuple(compiled.allowed), tuple(compiled.allowed_in)))
+
+    def _set_state(self, participants: Tuple[str, ...], compiled) -> None:
+        # As máscaras são tuplas: o compilado é compartilhado com os drawers e precisa ser somente leitura
+        setattr_ = object.__setattr__
+        setattr_(self, "_participants", participants)
+        setattr_(self, "_compiled", compiled)
+        setattr_(self, "_hash", hash((participants, compiled.allowed)))
+        setattr_(self, "_degrees", tuple(m.bit_count() for m in compiled.allowed))
+        setattr_(self, "_in_degrees", tuple(m.bit_count() for m in compiled.allowed_in))
+        setattr_(self, "_allowed_pairs", sum(self._degrees))
+        setattr_(self, "_feasibility", {})  # require_cycle -> (mensagem, conflito) ou None, calculado sob demanda
+        setattr_(self, "_blocked", None)  # participante -> frozenset de quem não pode tirar, montado sob demanda
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RestrictionGraph é imutável.")
+
+    def __delattr__(self, name):
+        raise AttributeError("RestrictionGraph é imutável.")
+
+    def __repr__(self):
+        return f"RestrictionGraph({len(self._participants)} participantes, {self._allowed_pairs} pares permitidos)"
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RestrictionGraph):
+            return NotImplemented
+
+        return self is other or (
+            self._hash == other._hash
+            and self._participants == other._participants
+            and self._compiled.allowed == other._compiled.allowed
+        )
+
+    def __len__(self) -> int:
+        return len(self._participants)
+
+    def __contains__(self, participant: str) -> bool:
+        return participant in self._compiled.index
+
+    def __reduce__(self):  # Permite trafegar entre processos: só as máscaras, sem revalidar do outro lado
+        return _graph_from_masks, (self._participants, self._compiled.allowed, self._compiled.allowed_in)
+
+    @property
+    def participants(self) -> Tuple[str, ...]:
+        return self._participants
+
+    @property
+    def allowed_pairs(self) -> int:
+        return self._allowed_pairs
+
+    def degree(self, participant: str) -> int:
+        """Quantas pessoas `participant` pode tirar."""
+        return self._degrees[self._compiled.index[participant]]
+
+    def in_degree(self, participant: str) -> int:
+        """Quantas pessoas podem tirar `participant`."""
+        return self._in_degrees[self._compiled.index[participant]]
+
+    def may_draw(self, giver: str, receiver: str) -> bool:
+        index = self._compiled.index
+        return self._compiled.may_draw(index[giver], index[receiver])
+
+    def blocked(self, participant: str) -> Set[str]:
+        """Conjunto de quem `participant` não pode tirar (inclui ele mesmo), no formato antigo."""
+        return set(self.as_mapping()[participant])
+
+    def as_mapping(self) -> Mapping[str, FrozenSet[str]]:
+        """Restrições no formato antigo (participante -> quem não pode tirar), somente leitura. Montado uma
+        única vez a partir do complemento das máscaras: custo proporcional ao número de restrições."""
+        if self._blocked is None:
+            from ..drawers.compiled import iter_bits
+
+            names = self._participants
+            full = self._compiled.full
+            blocked = {p: frozenset(names[j] for j in iter_bits(full & ~mask)) for p, mask in zip(names, self._compiled.allowed)}
+            object.__setattr__(self, "_blocked", MappingProxyType(blocked))
+
+        return self._blocked
+
+    def to_dict(self) -> Dict[str, Set[str]]:
+        return {p: set(q) for p, q in self.as_mapping().items()}
+
+    def compiled_for(self, participants: List[str]):
+        """Forma compilada (somente leitura) usada pelos drawers. Os participantes precisam ser os mesmos."""
+        if len(participants) != len(self._participants) or tuple(participants) != self._participants:
+            raise InvalidRestrictionsException("Os participantes do sorteio não são os mesmos do RestrictionGraph.")
+
+        return self._compiled
+
+    def check_feasibility(self, require_cycle: bool = False) -> None:
+        # Resultado guardado por tipo de sorteio: a verificação roda no máximo uma vez para cada
+        if require_cycle not in self._feasibility:
+            from ..drawers.feasibility import check_feasibility
+
+            try:
+                check_feasibility(self._compiled, require_cycle=require_cycle)
+                self._feasibility[require_cycle] = None
+            except InfeasibleRestrictionsException as e:
+                self._feasibility[require_cycle] = (str(e), tuple(e.conflict))
+
+        # Exceção nova a cada chamada: a mesma instância levantada de várias threads acumularia tracebacks
+        cached = self._feasibility[require_cycle]
+        if cached is not None:
+            message, conflict = cached
+            raise InfeasibleRestrictionsException(message, list(conflict))
+
+
+def _graph_from_masks(participants: Tuple[str, ...], allowed: Tuple[int, ...], allowed_in: Tuple[int, ...]) -> RestrictionGraph:
+    # Contraparte do __reduce__: as máscaras vieram de um RestrictionGraph já validado
+    from ..drawers.compiled import CompiledRestrictions
+
+    graph = RestrictionGraph.__new__(RestrictionGraph)
+    graph._set_state(participants, CompiledRestrictions.from_masks(participants, allowed, allowed_in))
+    return graph
+
+
+Restrictions = Union[Dict[str, Set[str]], GroupRestrictions, RestrictionGraph]
+
+
+def as_graph(participants: Iterable[str], restrictions: Restrictions) -> RestrictionGraph:
+    if isinstance(restrictions, RestrictionGraph):
+        restrictions.compiled_for(list(participants))  # Só confere se os participantes são os mesmos
+        return restrictions
+
+    return RestrictionGraph(participants, restrictions)
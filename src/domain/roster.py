@@ -0,0 +1,81 @@
+import csv
+import io
+from typing import Dict, List, NamedTuple, Set
+from .restrictions import GroupRestrictions
+
+COLUMNS = ("nome", "telefone", "grupos")
+GROUP_SEPARATOR = "|"
+
+
+class Roster(NamedTuple):
+    names: List[str]
+    phones: List[str]
+    groups: Dict[str, List[str]]  # grupo -> membros (quem está no mesmo grupo não tira o outro)
+    errors: List[str]
+
+
+def normalize_phone(phone: str) -> str:
+    return phone.replace(" ", "").replace("-", "").replace("+", "")
+
+
+def parse_roster_text(text: str) -> List[Dict[str, str]]:
+    """Lê participantes colados/importados (CSV ou colunas separadas por TAB/;), com as colunas
+    nome, telefone e grupos (vários grupos separados por |). O cabeçalho é opcional."""
+    text = text.strip()
+    if not text:
+        return []
+
+    first_line = text.splitlines()[0]
+    delimiter = max("\t;,", key=first_line.count)
+
+    rows = []
+    for i, fields in enumerate(csv.reader(io.StringIO(text), delimiter=delimiter)):
+        fields = [f.strip() for f in fields]
+        if i == 0 and fields and fields[0].lower() == COLUMNS[0]:  # Cabeçalho
+            continue
+
+        if not any(fields):
+            continue
+
+        fields += [""] * (len(COLUMNS) - len(fields))
+        rows.append(dict(zip(COLUMNS, fields)))
+
+    return rows
+
+
+def validate_roster(rows: List[Dict[str, str]]) -> Roster:
+    names = []
+    phones = []
+    groups: Dict[str, List[str]] = {}
+    errors = []
+    seen: Set[str] = set()
+
+    for line, row in enumerate(rows, start=1):
+        name = (row.get("nome") or "").strip()
+        phone = normalize_phone(row.get("telefone") or "")
+
+        if not name:
+            errors.append(f"Linha {line}: nome não informado.")
+            continue
+
+        if name in seen:
+            errors.append(f"Linha {line}: '{name}' repetido. Se houver pessoas com o mesmo nome, inclua o sobrenome.")
+            continue
+
+        if not phone.isdigit():
+            errors.append(f"Linha {line}: telefone inválido para '{name}'.")
+
+        seen.add(name)
+        names.append(name)
+        phones.append(phone)
+
+        for group in (row.get("grupos") or "").split(GROUP_SEPARATOR):
+            group = group.strip()
+            if group:
+                groups.setdefault(group, []).append(name)
+
+    return Roster(names, phones, groups, errors)
+
+
+def restrictions_from_groups(names: List[str], groups: Dict[str, List[str]]) -> GroupRestrictions:
+    return GroupRestrictions(names, groups)  # Sem materializar um conjunto por pessoa
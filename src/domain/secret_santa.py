@@ -1,55 +1,125 @@
-from typing import Dict, List, Set
-from ..drawers import BaseDrawer
+from typing import FrozenSet, List, Mapping, Optional
+from ..drawers import BaseDrawer, DrawStats
+from .assignment import Assignment
+from .restrictions import RestrictionGraph, Restrictions, as_graph
+
+_NO_RESULTS = Assignment((), ())
+
 
 class SecretSanta:
     def __init__(
         self,
         participants: List[str],
-        restrictions: Dict[str, Set[str]],
+        restrictions: Restrictions,
         drawer: BaseDrawer,
         description: str = "Amigo Secreto",
+        gifts_per_person: int = 1,
     ) -> None:
-        self._participants = participants.copy()
-        self._restrictions = {k: set(v) for k, v in restrictions.items()}  # Para fazer deep copy dos sets tb
+        self._graph = as_graph(participants, restrictions)  # Valida uma única vez; imutável, sem cópias
+        self._participants = list(self._graph.participants)
         self._description = description
         self._drawer = drawer
-        self._results = {}
+        self._gifts_per_person = gifts_per_person  # Com k > 1, são k sorteios sem repetir quem tirou quem
+        self._results: Optional[Assignment] = None
+        self._rounds: List[Assignment] = []
+        self._previous_results: Optional[Assignment] = None  # Último sorteio antes de uma mudança de participantes/restrições
 
     def __repr__(self):
+        return "".join(self.iter_report())
+
+    def iter_report(self):
+        # Relatório gerado linha a linha (sem concatenar strings): dá para escrever direto em um arquivo
         if not self.is_drawn():
-            s = f"SORTEIO AINDA NÃO REALIZADO PARA {self._description.upper()}\n\n"
+            yield f"SORTEIO AINDA NÃO REALIZADO PARA {self._description.upper()}\n\n"
             for p in sorted(self._participants):
-                s += f'{p} {(15-len(p))*"-"}> TBD\n'
+                yield f'{p} {(15-len(p))*"-"}> TBD\n'
 
-            return s
+            return
 
-        s = f"RESULTADOS PARA {self._description.upper()}\n\n"
-        for k in sorted(self._results.keys()):
-            s += f'{k} {(15-len(k))*"-"}> {self._results[k]}\n'
+        yield f"RESULTADOS PARA {self._description.upper()}\n\n"
+        if self._gifts_per_person == 1:
+            yield from self._results.iter_report()
+            return
 
-        return s
+        for p in sorted(self._participants):
+            yield f'{p} {(15-len(p))*"-"}> {", ".join(r[p] for r in self._rounds)}\n'
 
     @property
     def participants(self) -> List[str]:
         return self._participants.copy()  # Para garantir que o usuário não acesse o valor diretamente
 
     @property
-    def restrictions(self) -> Dict[str, Set[str]]:
-        return {k: set(v) for k, v in self._restrictions.items()}  # Para fazer deep copy dos sets tb  # Para garantir que o usuário não acesse o valor diretamente
+    def restrictions(self) -> Mapping[str, FrozenSet[str]]:
+        return self._graph.as_mapping()  # Somente leitura e montado uma vez por grafo: sem cópia a cada acesso
+
+    @property
+    def graph(self) -> RestrictionGraph:
+        return self._graph  # Imutável: pode ser compartilhado sem cópia
 
     @property
-    def results(self) -> Dict[str, str]:
-        return self._results.copy()  # Para garantir que o usuário não acesse o valor diretamente
+    def results(self) -> Assignment:
+        # Imutável: pode ser compartilhado sem cópia. Antes do sorteio, vazio (como o {} de antes)
+        return self._results if self._results is not None else _NO_RESULTS
     
-    def draw(self, redraw: bool = False) -> Dict[str, str]:
+    @property
+    def rounds(self) -> List[Assignment]:
+        return self._rounds.copy()  # Um Assignment por presente (com gifts_per_person=1, só o results)
+
+    @property
+    def stats(self) -> Optional[DrawStats]:
+        return self._drawer.last_stats  # Só é preenchido com o drawer instrumentado (drawer.instrument())
+
+    @property
+    def seed(self) -> Optional[int]:
+        return self._drawer.last_seed  # Semente do último sorteio: Drawer(seed=...) reproduz o resultado
+
+    def draw(self, redraw: bool = False, repair: bool = False) -> Assignment:
+        # Com gifts_per_person > 1 devolve a primeira rodada (a mesma de `results`); todas vêm do draw_rounds
+        if self._gifts_per_person > 1:
+            if repair:
+                raise ValueError("O reparo local não se aplica a mais de um presente por pessoa. Use draw(redraw=True).")
+
+            self.draw_rounds(redraw)
+            return self.results
+
         if self.is_drawn() and not redraw:
             return self.results
 
-        self._results = self._drawer.draw(self._participants, self._restrictions)
+        # Com repair=True o sorteio anterior é mantido e apenas as partes afetadas pelas mudanças são refeitas
+        previous = self._results or self._previous_results
+        if repair and previous:
+            self._results = self._drawer.repair(self._graph.participants, self._graph, previous)
+        else:
+            self._results = self._drawer.draw(self._graph.participants, self._graph)
+
+        self._rounds = [self._results]
+        self._previous_results = None
         return self.results
 
+    def draw_rounds(self, redraw: bool = False) -> List[Assignment]:
+        """Um Assignment por presente, sem repetir quem tirou quem (com gifts_per_person=1, só o results)."""
+        if self._gifts_per_person == 1:
+            self.draw(redraw)
+            return self.rounds
+
+        if redraw or not self.is_drawn():
+            self._rounds = self._drawer.draw_many(self._graph.participants, self._graph, self._gifts_per_person)
+            self._results = self._rounds[0]
+            self._previous_results = None
+
+        return self.rounds
+
+    def update(self, participants: List[str], restrictions: Restrictions) -> None:
+        self._graph = as_graph(participants, restrictions)
+        self._participants = list(self._graph.participants)
+
+        if self._results is not None:  # O resultado antigo deixa de valer, mas é guardado para o draw(repair=True)
+            self._previous_results = self._results
+            self._results = None
+            self._rounds = []
+
     def is_drawn(self) -> bool:
-        return bool(self._results)
+        return self._results is not None
 
     def get_result(self, participant: str) -> str:
         if not self.is_drawn():
@@ -59,3 +129,23 @@ class SecretSanta:
             return self._results[participant]
         except KeyError:
             raise ValueError(f"Participante '{participant}' não encontrado.")
+
+    def get_giver(self, participant: str) -> str:
+        """Quem tirou `participant`."""
+        if not self.is_drawn():
+            raise ValueError("Sorteio ainda não realizado. Execute o método generate_drawing antes de chamar este método.")
+
+        try:
+            return self._results.giver_of(participant)
+        except KeyError:
+            raise ValueError(f"Participante '{participant}' não encontrado.")
+
+    def get_results(self, participant: str) -> List[str]:
+        """Quem `participant` tirou em cada rodada (gifts_per_person > 1)."""
+        if not self.is_drawn():
+            raise ValueError("Sorteio ainda não realizado. Execute o método generate_drawing antes de chamar este método.")
+
+        try:
+            return [r[participant] for r in self._rounds]
+        except KeyError:
+            raise ValueError(f"Participante '{participant}' não encontrado.")
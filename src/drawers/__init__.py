@@ -1,5 +1,11 @@
 from .base import BaseDrawer
+from .compiled import CompiledRestrictions
 from .dfs import DFSDrawer
 from .las_vegas import LasVegasDrawer
+from .matching import MatchingDrawer
+from .mcmc import MCMCDrawer
+from .portfolio import PortfolioDrawer
+from .stats import METRICS, DrawMetrics, DrawStats, cprofile_hook
+from .vectorized import VectorizedLasVegasDrawer
 
-__all__ = ["BaseDrawer", "DFSDrawer", "LasVegasDrawer"]
+__all__ = ["BaseDrawer", "CompiledRestrictions", "DFSDrawer", "LasVegasDrawer", "MatchingDrawer", "MCMCDrawer", "PortfolioDrawer", "VectorizedLasVegasDrawer", "DrawMetrics", "DrawStats", "METRICS", "cprofile_hook"]
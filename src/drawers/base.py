@@ -1,34 +1,270 @@
+import time
+import random
 from abc import ABC, abstractmethod
-from typing import List, Dict, Set
-from ..exceptions import InvalidRestrictionsException
+from typing import Callable, ContextManager, List, Dict, Optional
+from .bipartite import hopcroft_karp, random_greedy_matching, random_k_factor
+from .compiled import CompiledRestrictions
+from .feasibility import check_feasibility
+from .stats import COUNTERS, METRICS, DrawMetrics, DrawStats
+from .validation import validate_compiled, validate_restrictions
+from ..domain.assignment import Assignment
+from ..domain.restrictions import RestrictionGraph, Restrictions
+from ..exceptions import DrawException, DrawTimeoutException, InfeasibleRestrictionsException, NoValidMatchingException
+
+_SYSTEM_RANDOM = random.SystemRandom()  # Sem estado compartilhado (lê do os.urandom)
+
 
 class BaseDrawer(ABC):
-    def draw(self, participants: List[str], restrictions: Dict[str, Set[str]]) -> Dict[str, str]:
-        self._validate_restrictions(participants, restrictions)
-        return self._draw(participants, restrictions)
+    requires_cycle = False  # Se o resultado precisa ser um ciclo único (e não qualquer atribuição)
+    max_round_restarts = 20  # Recomeços permitidos no sorteio de vários presentes por pessoa com ciclo único
+    polynomial = False  # Tempo polinomial garantido e falha só quando não há solução (ex.: emparelhamento)
+
+    def __init__(self, precheck: bool = True, seed: Optional[int] = None):
+        self._precheck = precheck  # Rejeita rapidamente restrições comprovadamente impossíveis
+        self._seed = seed  # Semente fixa: mesma entrada -> mesmo resultado (replay de casos lentos)
+        self._rng = random.Random(seed)  # Gerador próprio: drawers em threads diferentes não disputam o global
+        self.last_seed: Optional[int] = None  # Semente usada no último sorteio
+        self._instrumented = False  # Desligado, o custo é uma checagem de bool por fase
+        self._metrics: Optional[DrawMetrics] = None
+        self._profiler: Optional[Callable[[str], ContextManager]] = None
+        self.last_stats: Optional[DrawStats] = None
+
+    @property
+    def precheck(self) -> bool:
+        return self._precheck
+
+    def instrument(
+        self,
+        metrics: Optional[DrawMetrics] = METRICS,
+        profiler: Optional[Callable[[str], ContextManager]] = None,
+    ) -> "BaseDrawer":
+        """Liga a medição por fase (validate, compile, precheck, draw, repair) e os contadores. Cada sorteio
+        passa a deixar um DrawStats em `last_stats`, agregado em `metrics`. `profiler(fase)` deve devolver um
+        context manager (ex.: cprofile_hook) que envolve cada fase."""
+        self._instrumented = True
+        self._metrics = metrics
+        self._profiler = profiler
+        return self
+
+    def draw(self, participants: List[str], restrictions: Restrictions) -> Assignment:
+        return self.draw_compiled(self.compile(participants, restrictions))
+
+    def compile(self, participants: List[str], restrictions: Restrictions) -> CompiledRestrictions:
+        """Valida e pré-processa as restrições. O resultado é somente leitura e pode ser reaproveitado
+        (inclusive entre threads) em vários draw_compiled de drawers com o mesmo requires_cycle."""
+        self._begin_stats(len(participants))
+        try:
+            return self._prepare(participants, restrictions)
+        except Exception as e:
+            self._finish_stats(e)
+            raise
+
+    def draw_compiled(self, compiled: CompiledRestrictions) -> Assignment:
+        self._begin_stats(compiled.n)
+        self._reseed()
+        try:
+            successors = self._timed("draw", self._draw, compiled)
+        except Exception as e:
+            self._finish_stats(e)
+            raise
+
+        self._finish_stats()
+        return compiled.to_names(successors)  # Só voltamos para os nomes no final
+
+    def draw_many(self, participants: List[str], restrictions: Restrictions, k: int) -> List[Assignment]:
+        """k sorteios em que ninguém repete quem tirou (pares doador -> sorteado nunca se repetem)."""
+        if k < 1:
+            raise ValueError("O número de presentes por pessoa deve ser pelo menos 1.")
+
+        compiled = self.compile(participants, restrictions)
+        self._reseed()
+        try:
+            self._check_degrees(compiled, k)
+            rounds = self._timed("draw", self._draw_many, compiled, k)
+        except Exception as e:
+            self._finish_stats(e)
+            raise
+
+        self._finish_stats()
+        return [compiled.to_names(successors) for successors in rounds]
+
+    def repair(self, participants: List[str], restrictions: Restrictions, previous: Dict[str, str]) -> Assignment:
+        """Refaz o sorteio após pequenas mudanças (participantes/restrições) mantendo o máximo possível do
+        resultado anterior. Só recorre a um sorteio completo se o reparo local falhar."""
+        compiled = self.compile(participants, restrictions)
+
+        # Mantém apenas as arestas do sorteio anterior que continuam válidas
+        partial = [-1] * compiled.n
+        taken = set()
+        for giver, receiver in previous.items():
+            i = compiled.index.get(giver)
+            j = compiled.index.get(receiver)
+            if i is not None and j is not None and j not in taken and compiled.may_draw(i, j):
+                partial[i] = j
+                taken.add(j)
+
+        self._reseed()
+        try:
+            successors = self._timed("repair", self._repair, compiled, partial)
+            if successors is None:  # Mesma semente: o replay também refaz este sorteio completo
+                successors = self._timed("draw", self._draw, compiled)
+        except Exception as e:
+            self._finish_stats(e)
+            raise
+
+        self._finish_stats()
+        return compiled.to_names(successors)
+
+    def _prepare(self, participants: List[str], restrictions: Restrictions) -> CompiledRestrictions:
+        if isinstance(restrictions, RestrictionGraph):  # Já validado e compilado na construção
+            compiled = restrictions.compiled_for(participants)
+            if self._precheck:
+                self._timed("precheck", restrictions.check_feasibility, self.requires_cycle)
+
+            return compiled
+
+        self._timed("validate", self._validate_restrictions, participants, restrictions)
+        compiled = self._timed("compile", self._compile, participants, restrictions)
+        if self._precheck:
+            self._timed("precheck", check_feasibility, compiled, self.requires_cycle)
+
+        return compiled
+
+    def _compile(self, participants: List[str], restrictions: Restrictions) -> CompiledRestrictions:
+        compiled = CompiledRestrictions(participants, restrictions)
+        self._validate_compiled(compiled)
+        return compiled
+
+    def _reseed(self, seed: Optional[int] = None) -> None:
+        # Cada sorteio usa um gerador novo com semente registrada: sem semente fixa, vem do sistema operacional
+        if seed is None:
+            seed = self._seed if self._seed is not None else _SYSTEM_RANDOM.getrandbits(64)
+
+        self._rng = random.Random(seed)
+        self.last_seed = seed
+        if self._instrumented and self.last_stats is not None:
+            self.last_stats.seed = seed
+
+    def _timed(self, phase: str, fn, *args):
+        if not self._instrumented:
+            return fn(*args)
+
+        start = time.perf_counter()
+        try:
+            if self._profiler is None:
+                return fn(*args)
+
+            with self._profiler(phase):
+                return fn(*args)
+        finally:
+            phases = self.last_stats.phases
+            phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - start
+
+    def _begin_stats(self, n: int) -> None:
+        # Um sorteio pode começar no compile (draw/repair) ou direto no draw_compiled (restrições em cache)
+        if self._instrumented and (self.last_stats is None or self.last_stats.finished):
+            self.last_stats = DrawStats(type(self).__name__, n)
+
+    def _finish_stats(self, error: Optional[BaseException] = None) -> None:
+        stats = self.last_stats
+        if not self._instrumented or stats is None or stats.finished:
+            return
+
+        stats.finished = True
+        stats.outcome = "ok" if error is None else type(error).__name__
+        stats.counters = {c: getattr(self, c) for c in COUNTERS if hasattr(self, c)}
+        if self._metrics is not None:
+            self._metrics.observe(stats)
+
+    def _check_degrees(self, compiled: CompiledRestrictions, k: int):
+        for i in range(compiled.n):
+            options = min(compiled.allowed[i].bit_count(), compiled.allowed_in[i].bit_count())
+            if options < k:
+                name = compiled.names[i]
+                raise InfeasibleRestrictionsException(
+                    f"'{name}' só pode tirar ou ser tirado por {options} pessoa(s), menos que os {k} presentes por pessoa.",
+                    [name],
+                )
+
+    def _draw_many(self, compiled: CompiledRestrictions, k: int) -> List[List[int]]:
+        if not self.requires_cycle:
+            return self._draw_k_factor(compiled, k)
+
+        # Ciclo único por rodada: uma rodada por vez com o próprio _draw. Os pares usados saem das máscaras de
+        # forma incremental (cópia O(N) das listas por tentativa, nada de copiar restrições) e, se uma rodada
+        # ficar sem solução, recomeça com novas escolhas aleatórias. Só a primeira rodada falhar é definitivo; das
+        # outras em diante a falha pode ser culpa das rodadas anteriores, então esgotar os recomeços é timeout
+        error = None
+        for _ in range(self.max_round_restarts):
+            allowed = list(compiled.allowed)
+            allowed_in = list(compiled.allowed_in)
+            rounds = []
+            try:
+                for _ in range(k):
+                    view = compiled.with_masks(allowed, allowed_in)
+                    if rounds and self._precheck:
+                        check_feasibility(view, require_cycle=self.requires_cycle)
+
+                    successors = self._draw(view)
+                    rounds.append(successors)
+                    for i, j in enumerate(successors):
+                        allowed[i] &= ~(1 << j)
+                        allowed_in[j] &= ~(1 << i)
+
+                return rounds
+            except DrawException as e:
+                if not rounds:
+                    raise
+
+                error = e
+
+        raise DrawTimeoutException(
+            f"Não foi possível completar {k} rodadas em ciclo único após {self.max_round_restarts} recomeços."
+        ) from error
+
+    def _draw_k_factor(self, compiled: CompiledRestrictions, k: int) -> List[List[int]]:
+        # Uma única busca: escolhe um k-fator (k recebedores por doador, k doadores por recebedor) e o divide em
+        # k emparelhamentos perfeitos, que sempre existem em um grafo bipartido k-regular
+        chosen = random_k_factor(compiled.allowed, k, self._rng)
+        if chosen is None:
+            raise NoValidMatchingException(f"Não é possível realizar {k} sorteios sem repetir pares respeitando as restrições.")
+
+        rounds = []
+        for _ in range(k):
+            match_l = [-1] * compiled.n
+            match_r = [-1] * compiled.n
+            random_greedy_matching(chosen, match_l, match_r, self._rng)
+            hopcroft_karp(chosen, match_l, match_r)
+            rounds.append(match_l)
+            for i, j in enumerate(match_l):
+                chosen[i] &= ~(1 << j)
+
+        return rounds
 
-    def _validate_restrictions(self, participants: List[str], restrictions: Dict[str, Set[str]]):
-        participants_set = set(participants)
-        missing = participants_set - restrictions.keys()
-        if missing:
-            raise InvalidRestrictionsException(f"Participantes sem restrições definidas: {', '.join(missing)}")
+    def _repair(self, compiled: CompiledRestrictions, partial: List[int]) -> Optional[List[int]]:
+        # Padrão (sorteios que aceitam qualquer atribuição): completa o emparelhamento parcial com caminhos
+        # aumentantes, que só alteram as arestas ao longo de cada caminho
+        if self.requires_cycle:
+            return None
 
-        for p in participants:
-            r = restrictions[p]
+        match_r = [-1] * compiled.n
+        for i, j in enumerate(partial):
+            if j != -1:
+                match_r[j] = i
 
-            if not isinstance(r, set):
-                raise TypeError(f"As restrições de '{p}' devem ser do tipo set.")
+        random_greedy_matching(compiled.allowed, partial, match_r, self._rng)
+        hopcroft_karp(compiled.allowed, partial, match_r)
+        if -1 in partial:
+            return None
 
-            if p not in r:
-                raise InvalidRestrictionsException(f"'{p}' deve estar em sua própria lista de restrições.")
+        return partial
 
-            invalid = r - participants_set
-            if invalid:
-                raise InvalidRestrictionsException(f"Restrições inválidas para '{p}': {', '.join(invalid)} não existe(m) nos participantes.")
+    def _validate_restrictions(self, participants: List[str], restrictions: Restrictions):
+        validate_restrictions(participants, restrictions)
 
-            if participants_set - r == set():
-                raise InvalidRestrictionsException(f"'{p}' não pode tirar ninguém (restrições impossíveis).")
+    def _validate_compiled(self, compiled: CompiledRestrictions):
+        validate_compiled(compiled)
 
     @abstractmethod
-    def _draw(self, participants: List[str], restrictions: Dict[str, Set[str]]) -> Dict[str, str]:
-        ...  # Deve ser implementado pelas filhas
+    def _draw(self, compiled: CompiledRestrictions) -> List[int]:
+        ...  # Deve ser implementado pelas filhas. Retorna, para cada índice, o índice de quem ele tirou
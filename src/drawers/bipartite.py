@@ -0,0 +1,171 @@
+from random import Random
+from typing import List, Optional
+from .compiled import iter_bits, random_bit
+
+
+def random_greedy_matching(allowed: List[int], match_l: List[int], match_r: List[int], rng: Random) -> int:
+    # Emparelhamento inicial guloso em ordem aleatória (é ele que garante a aleatoriedade do resultado)
+    free_right = 0
+    for v, u in enumerate(match_r):
+        if u == -1:
+            free_right |= 1 << v
+
+    order = [u for u in range(len(allowed)) if match_l[u] == -1]
+    rng.shuffle(order)
+
+    matched = 0
+    for u in order:
+        candidates = allowed[u] & free_right
+        if candidates:
+            v = random_bit(candidates, rng)
+            match_l[u] = v
+            match_r[v] = u
+            free_right &= ~(1 << v)
+            matched += 1
+
+    return matched
+
+
+def hopcroft_karp(allowed: List[int], match_l: List[int], match_r: List[int]) -> int:
+    """Completa (in-place) um emparelhamento máximo entre doadores (match_l) e recebedores (match_r).
+    Retorna quantos aumentos foram feitos."""
+    augmented = 0
+    while True:
+        # BFS em camadas a partir dos doadores livres; layer_rights[d] guarda os recebedores da camada d
+        dist = [-1] * len(allowed)
+        layer = [u for u, v in enumerate(match_l) if v == -1]
+        for u in layer:
+            dist[u] = 0
+
+        unseen = (1 << len(match_r)) - 1
+        layer_rights = []
+        found = False
+        while layer and not found:
+            reached = 0
+            next_layer = []
+            for u in layer:
+                reach = allowed[u] & unseen
+                unseen &= ~reach
+                reached |= reach
+                for v in iter_bits(reach):
+                    w = match_r[v]
+                    if w == -1:
+                        found = True
+                    else:
+                        dist[w] = len(layer_rights) + 1
+                        next_layer.append(w)
+
+            layer_rights.append(reached)
+            layer = next_layer
+
+        if not found:
+            return augmented
+
+        # DFS iterativa buscando caminhos aumentantes disjuntos e mínimos
+        layer_rights.append(0)
+        usable = (1 << len(match_r)) - 1
+        for root in [u for u, v in enumerate(match_l) if v == -1]:
+            stack = [root]
+            via = []
+            while stack:
+                u = stack[-1]
+                candidates = allowed[u] & usable & layer_rights[dist[u]]
+                if not candidates:  # Beco sem saída
+                    stack.pop()
+                    if via:
+                        via.pop()
+                    continue
+
+                v = (candidates & -candidates).bit_length() - 1
+                usable &= ~(1 << v)
+                via.append(v)
+
+                w = match_r[v]
+                if w != -1:
+                    stack.append(w)
+                    continue
+
+                for uu, vv in zip(stack, via):  # Inverte o caminho aumentante
+                    match_l[uu] = vv
+                    match_r[vv] = uu
+
+                augmented += 1
+                break
+
+
+def random_k_factor(allowed: List[int], k: int, rng: Random) -> Optional[List[int]]:
+    """Escolhe, para cada doador, k recebedores distintos de forma que cada recebedor também seja escolhido
+    exatamente k vezes (um k-fator do grafo bipartido). Retorna as arestas escolhidas como bitmasks por
+    doador, ou None se isso for impossível."""
+    n = len(allowed)
+    sel = [0] * n  # sel[u]: recebedores escolhidos para u
+    sel_in = [0] * n  # sel_in[v]: doadores que escolheram v
+    deg_l = [0] * n
+    deg_r = [0] * n
+    saturated = 0  # Recebedores que já têm k doadores
+
+    # Guloso em ordem aleatória: resolve quase tudo, os caminhos aumentantes só completam o resto
+    order = list(range(n))
+    for _ in range(k):
+        rng.shuffle(order)
+        for u in order:
+            candidates = allowed[u] & ~sel[u] & ~saturated
+            if candidates:
+                v = random_bit(candidates, rng)
+                sel[u] |= 1 << v
+                sel_in[v] |= 1 << u
+                deg_l[u] += 1
+                deg_r[v] += 1
+                if deg_r[v] == k:
+                    saturated |= 1 << v
+
+    for root in range(n):
+        while deg_l[root] < k:
+            # BFS alternando arestas livres (doador -> recebedor) e escolhidas (recebedor -> outro doador)
+            parent_r = {}
+            parent_l = {root: -1}
+            visited_r = 0
+            visited_l = 1 << root
+            frontier = [root]
+            end = -1
+            while frontier and end == -1:
+                next_frontier = []
+                for u in frontier:
+                    reach = allowed[u] & ~sel[u] & ~visited_r
+                    visited_r |= reach
+                    for v in iter_bits(reach):
+                        parent_r[v] = u
+                        if deg_r[v] < k:
+                            end = v
+                            break
+
+                        for w in iter_bits(sel_in[v] & ~visited_l):
+                            visited_l |= 1 << w
+                            parent_l[w] = v
+                            next_frontier.append(w)
+
+                    if end != -1:
+                        break
+
+                frontier = next_frontier
+
+            if end == -1:  # Nenhum caminho aumentante a partir de root: não existe k-fator
+                return None
+
+            v = end
+            while True:  # Inverte o caminho: arestas livres entram, escolhidas saem
+                u = parent_r[v]
+                sel[u] |= 1 << v
+                sel_in[v] |= 1 << u
+                prev = parent_l[u]
+                if prev == -1:
+                    break
+
+                sel[u] &= ~(1 << prev)
+                sel_in[prev] &= ~(1 << u)
+                v = prev
+
+            deg_l[root] += 1
+            deg_r[end] += 1
+
+    return sel
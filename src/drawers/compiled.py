@@ -0,0 +1,109 @@
+from random import Random
+from typing import Dict, Iterator, List, Sequence, Set, Tuple
+from ..domain.assignment import Assignment
+from ..domain.restrictions import GroupRestrictions, Restrictions
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def random_bit(mask: int, rng: Random) -> int:
+    # Primeiro bit ligado a partir de uma posição aleatória (o bit mais alto garante que sempre existe)
+    shifted = mask >> rng.randrange(mask.bit_length())
+    return mask.bit_length() - shifted.bit_length() + (shifted & -shifted).bit_length() - 1
+
+
+class CompiledRestrictions:
+    """Representação compacta das restrições: participantes viram índices inteiros e os
+    conjuntos de quem cada um pode tirar viram bitmasks (bit j ligado = pode tirar o índice j)."""
+
+    __slots__ = ("names", "index", "n", "full", "allowed", "allowed_in")
+
+    def __init__(self, participants: List[str], restrictions: Restrictions) -> None:
+        self.names = list(participants)
+        self.index = {p: i for i, p in enumerate(self.names)}
+        self.n = len(self.names)
+        self.full = (1 << self.n) - 1
+
+        if isinstance(restrictions, GroupRestrictions):
+            blocked, blocked_in = self._block_groups(restrictions)
+        else:
+            blocked, blocked_in = self._block_sets(restrictions)
+
+        # Trabalhamos a partir das restrições (em geral esparsas) para não percorrer os pares permitidos
+        self.allowed = [self.full & ~b for b in blocked]  # Quem i pode tirar
+        self.allowed_in = [self.full & ~b for b in blocked_in]  # Quem pode tirar j
+
+    def _block_sets(self, restrictions: Dict[str, Set[str]]) -> Tuple[List[int], List[int]]:
+        blocked = [0] * self.n
+        blocked_in = [0] * self.n
+        for i, p in enumerate(self.names):
+            bit = 1 << i
+            for r in restrictions[p]:
+                j = self.index[r]
+                blocked[i] |= 1 << j
+                blocked_in[j] |= bit
+
+        return blocked, blocked_in
+
+    def _block_groups(self, restrictions: GroupRestrictions) -> Tuple[List[int], List[int]]:
+        # Uma máscara por grupo, aplicada a cada membro: O(N x grupos por pessoa) operações de bitmask.
+        # Membros do modelo que não estão neste sorteio são ignorados
+        index = self.index
+        blocked = [1 << i for i in range(self.n)]  # Ninguém tira a si mesmo
+        for _, members in restrictions.group_members():
+            indices = [index[p] for p in members if p in index]
+            mask = 0
+            for i in indices:
+                mask |= 1 << i
+
+            for i in indices:
+                blocked[i] |= mask
+
+        # Grupos são simétricos: até aqui quem i não pode tirar = quem não pode tirar i
+        blocked_in = blocked.copy()
+        for p, receivers in restrictions.forbidden.items():
+            i = index.get(p)
+            if i is None:
+                continue
+
+            for r in receivers:
+                j = index.get(r)
+                if j is not None:
+                    blocked[i] |= 1 << j
+                    blocked_in[j] |= 1 << i
+
+        return blocked, blocked_in
+
+    @classmethod
+    def from_masks(cls, participants: Sequence[str], allowed: Sequence[int], allowed_in: Sequence[int]) -> "CompiledRestrictions":
+        # Máscaras já compiladas (ex.: RestrictionGraph vindo de outro processo): não passa pelas restrições
+        compiled = cls.__new__(cls)
+        compiled.names = list(participants)
+        compiled.index = {p: i for i, p in enumerate(compiled.names)}
+        compiled.n = len(compiled.names)
+        compiled.full = (1 << compiled.n) - 1
+        compiled.allowed = allowed
+        compiled.allowed_in = allowed_in
+        return compiled
+
+    def with_masks(self, allowed: Sequence[int], allowed_in: Sequence[int]) -> "CompiledRestrictions":
+        # Mesmos participantes/índices (compartilhados, sem cópia), outras máscaras: ex.: sem os pares já usados
+        view = CompiledRestrictions.__new__(CompiledRestrictions)
+        view.names = self.names
+        view.index = self.index
+        view.n = self.n
+        view.full = self.full
+        view.allowed = allowed
+        view.allowed_in = allowed_in
+        return view
+
+    def may_draw(self, giver: int, receiver: int) -> bool:
+        return bool(self.allowed[giver] >> receiver & 1)
+
+    def to_names(self, successors: List[int]) -> Assignment:
+        return Assignment(self.names, successors, self.index)
@@ -1,47 +1,225 @@
-import random
-from typing import List, Dict, Set
+from typing import List, Optional
 from .base import BaseDrawer
-from ..exceptions import NoValidCycleException
+from .compiled import CompiledRestrictions, iter_bits, random_bit
+from ..exceptions import DrawException, DrawTimeoutException, NoValidCycleException
 
 class DFSDrawer(BaseDrawer):
-    def _draw(self, participants: List[str], restrictions: Dict[str, Set[str]]) -> Dict[str, str]:
-        possible_values_sorted = sorted(participants, key=lambda p: len(restrictions[p]), reverse=True)
+    requires_cycle = True
 
-        path = [possible_values_sorted[0]]
-        unused = set(possible_values_sorted[1:])
+    def __init__(self, max_expansions: int = 500_000, mrv_sample: int = 16, precheck: bool = True, seed: Optional[int] = None):
+        super().__init__(precheck=precheck, seed=seed)
+        self._max_expansions = max_expansions  # Limite de nós expandidos (garante tempo limitado)
+        self._mrv_sample = mrv_sample  # Máximo de candidatos avaliados na heurística "mais restrito primeiro"
+        self.expansions = 0
+        self.backtracks = 0
 
-        if self._dfs(path, unused, restrictions, len(participants)):  # Variável path é atualizada na função
-            results = self._get_results_from_path(path)
-            return results
+    def _draw(self, compiled: CompiledRestrictions) -> List[int]:
+        path = self._search(compiled.allowed, compiled.allowed_in)
+        return self._get_results_from_path(path)
 
-        raise NoValidCycleException("Não é possível realizar o sorteio garantindo ciclicidade.")
+    def _repair(self, compiled: CompiledRestrictions, partial: List[int]) -> Optional[List[int]]:
+        partial = partial.copy()
+        self._break_cycles(partial)
+
+        # Cada trecho mantido do ciclo anterior vira um "super nó" (cabeça -> ... -> cauda) e só religamos
+        # os trechos entre si. Se não houver solução, libera mais arestas e tenta de novo.
+        released = 1
+        while True:
+            chains = self._get_chains(partial)
+            path = self._link_chains(chains, compiled)
+            if path is not None:
+                successors = partial.copy()
+                for k in range(len(path)):
+                    successors[chains[path[k]][-1]] = chains[path[(k + 1) % len(path)]][0]
+
+                return successors
+
+            if len(chains) == compiled.n:  # Não sobrou nada do sorteio anterior: sorteio completo
+                return None
+
+            kept = [i for i, j in enumerate(partial) if j != -1]
+            for i in self._rng.sample(kept, min(released, len(kept))):
+                partial[i] = -1
+
+            released *= 2
+
+    def _break_cycles(self, partial: List[int]):
+        # Ciclos fechados entre os mantidos (ex.: entrou alguém novo) precisam ser abertos em algum ponto
+        seen = set()
+        for i in range(len(partial)):
+            cycle = []
+            cur = i
+            while cur != -1 and cur not in seen:
+                seen.add(cur)
+                cycle.append(cur)
+                cur = partial[cur]
+
+            if cur != -1 and cur in cycle:
+                cycle = cycle[cycle.index(cur):]
+                partial[self._rng.choice(cycle)] = -1
+
+    def _get_chains(self, partial: List[int]) -> List[List[int]]:
+        has_giver = [False] * len(partial)
+        for j in partial:
+            if j != -1:
+                has_giver[j] = True
+
+        chains = []
+        for head in range(len(partial)):
+            if not has_giver[head]:
+                chain = [head]
+                while partial[chain[-1]] != -1:
+                    chain.append(partial[chain[-1]])
+
+                chains.append(chain)
+
+        return chains
+
+    def _link_chains(self, chains: List[List[int]], compiled: CompiledRestrictions) -> Optional[List[int]]:
+        m = len(chains)
+        if m == 1:
+            return [0] if compiled.may_draw(chains[0][-1], chains[0][0]) else None
+
+        allowed = [0] * m
+        allowed_in = [0] * m
+        for k, tail_chain in enumerate(chains):
+            for l, head_chain in enumerate(chains):
+                if k != l and compiled.may_draw(tail_chain[-1], head_chain[0]):
+                    allowed[k] |= 1 << l
+                    allowed_in[l] |= 1 << k
+
+        try:
+            return self._search(allowed, allowed_in)
+        except DrawException:
+            return None
+
+    def _search(self, allowed: List[int], allowed_in: List[int]) -> List[int]:
+        n = len(allowed)
+        full = (1 << n) - 1
+        out_degree = [a.bit_count() for a in allowed]
+        in_degree = [a.bit_count() for a in allowed_in]
+
+        # Um nó só pode ficar sem doador/recebedor depois que pelo menos "grau" nós entraram no caminho,
+        # então na profundidade d só verificamos os nós de grau <= d (fragile[d])
+        fragile_in = self._fragile_masks(in_degree, n)
+        fragile_out = self._fragile_masks(out_degree, n)
+
+        # Começa pelo mais restritivo (menos pessoas possíveis de tirar)
+        start = min(range(n), key=lambda i: out_degree[i])
+        start_bit = 1 << start
 
-    def _dfs(self, path: List[str], unused: Set[str], restrictions: Dict[str, Set[str]], n: int):
-        if len(path) == n:
-            return path[0] not in restrictions[path[-1]]
+        path = [start]
+        unused = full & ~start_bit
+        stack = [allowed[start] & unused]  # Candidatos ainda não testados para cada posição do caminho
 
-        candidates = list(unused - restrictions[path[-1]])
-        random.shuffle(candidates)
+        self.expansions = 0
+        self.backtracks = 0
+        while stack:
+            c = self._next_candidate(stack[-1], unused, start_bit, allowed)
+            if c is None:  # Esgotou os candidatos desta posição
+                stack.pop()
+                unused |= 1 << path.pop()
+                self.backtracks += 1
+                continue
+
+            stack[-1] &= ~(1 << c)
+            self.expansions += 1
+            if self.expansions > self._max_expansions:
+                raise DrawTimeoutException("Sorteio excedeu o limite de nós expandidos. As restrições podem ser impossíveis de satisfazer.")
+
+            remaining = unused & ~(1 << c)
+            if not remaining:
+                if allowed[c] & start_bit:  # Fecha o ciclo
+                    path.append(c)
+                    return path
+
+                continue
+
+            depth = len(path)
+            if not self._forward_check(path[-1], c, remaining, start_bit, allowed, allowed_in,
+                                       fragile_in[depth], fragile_out[depth]):
+                continue
 
-        for c in candidates:
             path.append(c)
-            unused.remove(c)
+            unused = remaining
+            stack.append(allowed[c] & unused)
+
+        raise NoValidCycleException("Não é possível realizar o sorteio garantindo ciclicidade.")
+
+    def _next_candidate(self, candidates: int, unused: int, start_bit: int, allowed: List[int]) -> Optional[int]:
+        if not candidates:
+            return None
+
+        if candidates.bit_count() <= self._mrv_sample:
+            pool = list(iter_bits(candidates))
+        else:  # Muitos candidatos: avalia só uma amostra aleatória
+            pool = list({random_bit(candidates, self._rng) for _ in range(self._mrv_sample)})
+
+        self._rng.shuffle(pool)  # Desempate aleatório
+        receivers = unused | start_bit
+        return min(pool, key=lambda c: (allowed[c] & receivers).bit_count())
+
+    def _forward_check(
+        self,
+        prev: int,
+        c: int,
+        remaining: int,
+        start_bit: int,
+        allowed: List[int],
+        allowed_in: List[int],
+        fragile_in: int,
+        fragile_out: int,
+    ) -> bool:
+        if not allowed[c] & remaining:  # c precisa ter para quem dar
+            return False
+
+        if not allowed_in[start_bit.bit_length() - 1] & remaining:  # Alguém precisa fechar o ciclo
+            return False
+
+        # prev deixa de ser doador possível: quem dependia dele precisa de outro doador
+        givers = remaining | (1 << c)
+        for u in iter_bits(allowed[prev] & remaining & fragile_in):
+            if not allowed_in[u] & givers:
+                return False
+
+        # c deixa de ser recebedor possível: quem dependia dele precisa de outro recebedor
+        receivers = remaining | start_bit
+        for u in iter_bits(allowed_in[c] & remaining & fragile_out):
+            if not allowed[u] & receivers:
+                return False
+
+        return self._reaches_all(c, remaining, allowed)
+
+    def _reaches_all(self, source: int, remaining: int, allowed: List[int]) -> bool:
+        # Todos os não visitados precisam ser alcançáveis a partir do fim do caminho
+        reach = allowed[source] & remaining
+        frontier = reach
+        while frontier and reach != remaining:
+            u = (frontier & -frontier).bit_length() - 1
+            frontier &= frontier - 1
+
+            new = allowed[u] & remaining & ~reach
+            reach |= new
+            frontier |= new
+
+        return reach == remaining
 
-            if self._dfs(path, unused, restrictions, n):
-                return True
+    def _fragile_masks(self, degrees: List[int], n: int) -> List[int]:
+        by_degree = [0] * (n + 1)
+        for i, d in enumerate(degrees):
+            by_degree[d] |= 1 << i
 
-            path.pop()
-            unused.add(c)
+        masks = []
+        acc = 0
+        for d in range(n + 1):
+            acc |= by_degree[d]
+            masks.append(acc)
 
-        return False
+        return masks
 
-    def _get_results_from_path(self, path: List[str]) -> Dict[str, str]:
-        results = {}
+    def _get_results_from_path(self, path: List[int]) -> List[int]:
+        results = [0] * len(path)
         for idx in range(len(path)):
-            if idx < len(path) - 1:
-                results[path[idx]] = path[idx + 1]
+            results[path[idx]] = path[(idx + 1) % len(path)]
 
-            else:
-                results[path[idx]] = path[0]
-        
         return results
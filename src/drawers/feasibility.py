@@ -0,0 +1,103 @@
+from typing import List, Optional, Tuple
+from .bipartite import hopcroft_karp
+from .compiled import CompiledRestrictions, iter_bits
+from ..exceptions import InfeasibleRestrictionsException
+
+_MAX_HALL_ROOTS = 64  # Quantos doadores sem par testamos em busca do menor grupo conflitante
+
+
+def check_feasibility(compiled: CompiledRestrictions, require_cycle: bool = False):
+    """Pré-checagem polinomial: levanta InfeasibleRestrictionsException (com o menor grupo conflitante
+    encontrado) se as restrições forem comprovadamente impossíveis."""
+    conflict = _hall_violation(compiled)
+    if conflict is not None:
+        givers, receivers = conflict
+        names = [compiled.names[i] for i in givers]
+        options = ", ".join(compiled.names[j] for j in receivers) or "ninguém"
+        raise InfeasibleRestrictionsException(
+            f"{', '.join(names)} só podem tirar, juntos, {len(receivers)} pessoa(s) ({options}).", names
+        )
+
+    if not require_cycle:
+        return
+
+    conflict = _disconnected_group(compiled)
+    if conflict is not None:
+        group, is_sink = conflict
+        names = [compiled.names[i] for i in group]
+        if is_sink:
+            msg = f"{', '.join(names)} só podem tirar uns aos outros, impedindo um ciclo único."
+        else:
+            msg = f"Ninguém fora de {', '.join(names)} pode tirar alguém desse grupo, impedindo um ciclo único."
+
+        raise InfeasibleRestrictionsException(msg, names)
+
+
+def _hall_violation(compiled: CompiledRestrictions) -> Optional[Tuple[List[int], List[int]]]:
+    # Teorema de Hall: sem emparelhamento perfeito existe um grupo S com menos recebedores possíveis que |S|
+    match_l = [-1] * compiled.n
+    match_r = [-1] * compiled.n
+    hopcroft_karp(compiled.allowed, match_l, match_r)
+
+    free = [u for u, v in enumerate(match_l) if v == -1]
+    best = None
+    for root in free[:_MAX_HALL_ROOTS]:
+        # Doadores alcançáveis por caminhos alternantes a partir de root formam S, com |N(S)| = |S| - 1
+        group = 1 << root
+        receivers = 0
+        frontier = [root]
+        while frontier:
+            u = frontier.pop()
+            new = compiled.allowed[u] & ~receivers
+            receivers |= new
+            for v in iter_bits(new):
+                w = match_r[v]
+                group |= 1 << w
+                frontier.append(w)
+
+        if best is None or group.bit_count() < best[0].bit_count():
+            best = (group, receivers)
+
+    if best is None:
+        return None
+
+    return list(iter_bits(best[0])), list(iter_bits(best[1]))
+
+
+def _disconnected_group(compiled: CompiledRestrictions) -> Optional[Tuple[List[int], bool]]:
+    # Um ciclo único exige que o grafo de pares permitidos seja fortemente conexo
+    if _reach(compiled.allowed, 0, compiled.full) == compiled.full and _reach(compiled.allowed_in, 0, compiled.full) == compiled.full:
+        return None
+
+    # Decompõe em componentes fortemente conexas e reporta a menor "fonte" ou "sumidouro"
+    components = []
+    remaining = compiled.full
+    while remaining:
+        root = (remaining & -remaining).bit_length() - 1
+        component = _reach(compiled.allowed, root, remaining) & _reach(compiled.allowed_in, root, remaining)
+        components.append(component)
+        remaining &= ~component
+
+    best = None
+    for component in components:
+        outside = compiled.full & ~component
+        is_sink = not any(compiled.allowed[u] & outside for u in iter_bits(component))
+        is_source = not any(compiled.allowed_in[u] & outside for u in iter_bits(component))
+        if (is_sink or is_source) and (best is None or component.bit_count() < best[0].bit_count()):
+            best = (component, is_sink)
+
+    return list(iter_bits(best[0])), best[1]
+
+
+def _reach(adjacency: List[int], source: int, within: int) -> int:
+    reach = (1 << source) & within
+    frontier = reach
+    while frontier:
+        u = (frontier & -frontier).bit_length() - 1
+        frontier &= frontier - 1
+
+        new = adjacency[u] & within & ~reach
+        reach |= new
+        frontier |= new
+
+    return reach
@@ -1,36 +1,78 @@
 import time
-import random
-from typing import List, Dict, Set
+from itertools import islice
+from typing import List, Optional
 from .base import BaseDrawer
+from .compiled import CompiledRestrictions
 from ..exceptions import DrawTimeoutException
 
 class LasVegasDrawer(BaseDrawer):
-    def __init__(self, timeout: float = 30):
+    _rejection_tries = 16  # Sorteios aleatórios no pool antes de varrer os candidatos um a um
+
+    def __init__(self, timeout: float = 30, precheck: bool = True, seed: Optional[int] = None):
+        super().__init__(precheck=precheck, seed=seed)
         self._timeout = timeout
+        self.attempts = 0
+
+    def _draw(self, compiled: CompiledRestrictions) -> List[int]:
+        n = compiled.n
+        allowed = compiled.allowed
+        rand = self._rng.random
+        shuffle = self._rng.shuffle
+        tries = range(self._rejection_tries)
+
+        # Heurística para começarmos pelo mais restritivo: a ordem pelo nº de opções é calculada uma única vez
+        # e, a cada tentativa, só os empates são embaralhados (O(N))
+        by_degree = {}
+        for i in range(n):
+            by_degree.setdefault(allowed[i].bit_count(), []).append(i)
+        ties = [by_degree[d] for d in sorted(by_degree)]
+        order = [0] * n
 
-    def _draw(self, participants: List[str], restrictions: Dict[str, Set[str]]) -> Dict[str, str]:
-        results = {}
+        # Pool de quem ainda não foi tirado em um array plano: pool[:size] são os disponíveis e pos[j] é a
+        # posição de j no pool. Remover é trocar com o último, e o mesmo array serve para todas as tentativas
+        pool = list(range(n))
+        pos = list(range(n))
+        results = [-1] * n
 
+        self.attempts = 0
         start_time = time.monotonic()
         while True:
             if time.monotonic() - start_time > self._timeout:
                 raise DrawTimeoutException("Sorteio não convergiu dentro do tempo limite. As restrições podem ser impossíveis de satisfazer.")
 
-            participants_list = sorted(participants,  # Heuristica para começarmos pelo mais restritivo 
-                                       key=lambda p: (len(restrictions[p]), random.random()),  # Em caso de empate, faz sorteio aleatório
-                                       reverse=True)
-            available_users = set(participants_list)
+            self.attempts += 1
+            k = 0
+            for group in ties:
+                shuffle(group)  # Em caso de empate, faz sorteio aleatório
+                order[k:k + len(group)] = group
+                k += len(group)
 
-            results = {}
-            for participant in participants_list:
-                possible_users = available_users - restrictions[participant]
+            size = n
+            for participant in order:
+                mask = allowed[participant]
 
-                if not possible_users:  # Não há mais usuários a serem sorteados
-                    break
+                # Rejeição: sorteia no pool até cair em alguém permitido (uniforme entre os permitidos)
+                chosen = -1
+                for _ in tries:
+                    candidate = pool[int(rand() * size)]
+                    if mask >> candidate & 1:
+                        chosen = candidate
+                        break
 
-                chosen = random.choice(list(possible_users))
-                results[participant] = chosen
-                available_users.remove(chosen)
+                if chosen == -1:  # Poucos permitidos no pool: varre os disponíveis
+                    candidates = [c for c in islice(pool, size) if mask >> c & 1]
+                    if not candidates:  # Não há mais usuários a serem sorteados
+                        break
+
+                    chosen = candidates[int(rand() * len(candidates))]
 
-            if len(results) == len(participants):
+                size -= 1
+                idx = pos[chosen]
+                last = pool[size]
+                pool[idx] = last
+                pos[last] = idx
+                pool[size] = chosen
+                pos[chosen] = size
+                results[participant] = chosen
+            else:
                 return results
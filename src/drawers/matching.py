@@ -0,0 +1,23 @@
+from typing import List
+from .base import BaseDrawer
+from .bipartite import hopcroft_karp, random_greedy_matching
+from .compiled import CompiledRestrictions
+from ..exceptions import NoValidMatchingException
+
+class MatchingDrawer(BaseDrawer):
+    """Sorteio como emparelhamento perfeito bipartido (doadores x recebedores) via Hopcroft-Karp.
+    Assim como o Las Vegas, o resultado pode ter vários ciclos; mas roda em tempo polinomial garantido."""
+
+    polynomial = True
+
+    def _draw(self, compiled: CompiledRestrictions) -> List[int]:
+        match_l = [-1] * compiled.n
+        match_r = [-1] * compiled.n
+
+        matched = random_greedy_matching(compiled.allowed, match_l, match_r, self._rng)
+        matched += hopcroft_karp(compiled.allowed, match_l, match_r)
+
+        if matched < compiled.n:
+            raise NoValidMatchingException("Não é possível realizar o sorteio: não existe atribuição que respeite todas as restrições.")
+
+        return match_l
@@ -0,0 +1,179 @@
+from typing import Callable, List, Optional
+from .base import BaseDrawer
+from .compiled import CompiledRestrictions
+from .dfs import DFSDrawer
+from .matching import MatchingDrawer
+
+class MCMCDrawer(BaseDrawer):
+    """Amostrador (aproximadamente) uniforme: parte de um sorteio válido qualquer e percorre uma cadeia de
+    Markov de movimentos que respeitam as restrições. As propostas são simétricas e só movimentos válidos
+    são aceitos, então a distribuição estacionária é uniforme sobre os sorteios alcançáveis.
+
+    Com cycle=True o estado é um ciclo único e os movimentos são troca de duas posições e inversão de um
+    trecho; sem ciclo, é qualquer atribuição e os movimentos são troca de sorteados entre dois doadores e
+    rotação entre três.
+
+    Critério de mistura: após pelo menos `sweeps` varreduras (N passos cada), o aquecimento termina quando a
+    fração de pares ainda iguais aos do sorteio inicial fica a até `tolerance` do esperado ao acaso (média de
+    1/opções de cada um), com no máximo `max_sweeps` varreduras. Parar exatamente nesse momento enviesaria o
+    resultado (o critério depende do estado), então a cadeia roda de novo o mesmo número de varreduras antes
+    de devolver. Com tolerance=None são exatamente `sweeps` varreduras."""
+
+    def __init__(
+        self,
+        cycle: bool = False,
+        sweeps: int = 10,
+        max_sweeps: int = 200,
+        tolerance: Optional[float] = 0.05,
+        precheck: bool = True,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(precheck=precheck, seed=seed)
+        self.requires_cycle = cycle
+        self._sweeps = sweeps
+        self._max_sweeps = max_sweeps
+        self._tolerance = tolerance
+        self._initial = DFSDrawer(precheck=False) if cycle else MatchingDrawer(precheck=False)  # Ponto de partida
+        self.steps = 0
+        self.accepted = 0
+
+    def _draw(self, compiled: CompiledRestrictions) -> List[int]:
+        self._initial._reseed(self._rng.getrandbits(64))  # Mesma semente -> mesmo ponto de partida
+        start = self._initial._draw(compiled)
+
+        self.steps = 0
+        self.accepted = 0
+        if compiled.n < 3:
+            return start
+
+        if self.requires_cycle:
+            # O ciclo como sequência: order[p] tira order[p + 1] (e o último tira o primeiro)
+            order = [0] * compiled.n
+            cur = 0
+            for p in range(compiled.n):
+                order[p] = cur
+                cur = start[cur]
+
+            return self._run(compiled, start, lambda: self._sweep_cycle(order, compiled.allowed), lambda: self._successors(order))
+
+        sigma = start.copy()
+        return self._run(compiled, start, lambda: self._sweep_assignment(sigma, compiled.allowed), lambda: sigma)
+
+    def _run(self, compiled: CompiledRestrictions, start: List[int], sweep: Callable[[], None], state: Callable[[], List[int]]) -> List[int]:
+        # Sobreposição esperada com o início se cada um tirasse alguém ao acaso entre as suas opções
+        baseline = sum(1 / mask.bit_count() for mask in compiled.allowed) / compiled.n
+
+        burn_in = 0
+        while burn_in < self._max_sweeps:
+            sweep()
+            burn_in += 1
+            if self._mixed(burn_in, state(), start, baseline):
+                break
+
+        if self._tolerance is not None:  # Tempo fixo após o aquecimento, decidido antes de ver os estados seguintes
+            for _ in range(burn_in):
+                sweep()
+
+        return state()
+
+    def _mixed(self, sweeps: int, successors: List[int], start: List[int], baseline: float) -> bool:
+        if sweeps < self._sweeps:
+            return False
+
+        if self._tolerance is None:
+            return True
+
+        overlap = sum(a == b for a, b in zip(successors, start)) / len(start)
+        return overlap <= baseline + self._tolerance
+
+    def _sweep_assignment(self, sigma: List[int], allowed: List[int]) -> None:
+        n = len(sigma)
+        rand = self._rng.random
+        for _ in range(n):
+            i = int(rand() * n)
+            j = int(rand() * n)
+            if i == j:
+                continue
+
+            si = sigma[i]
+            sj = sigma[j]
+            if rand() < 0.5:  # Troca: i fica com o sorteado de j e vice-versa
+                if allowed[i] >> sj & 1 and allowed[j] >> si & 1:
+                    sigma[i] = sj
+                    sigma[j] = si
+                    self.accepted += 1
+            else:  # Rotação (i, j, k): i <- sigma[j], j <- sigma[k], k <- sigma[i]
+                k = int(rand() * n)
+                if k == i or k == j:
+                    continue
+
+                sk = sigma[k]
+                if allowed[i] >> sj & 1 and allowed[j] >> sk & 1 and allowed[k] >> si & 1:
+                    sigma[i] = sj
+                    sigma[j] = sk
+                    sigma[k] = si
+                    self.accepted += 1
+
+        self.steps += n
+
+    def _sweep_cycle(self, order: List[int], allowed: List[int]) -> None:
+        n = len(order)
+        rand = self._rng.random
+        for _ in range(n):
+            a = int(rand() * n)
+            if rand() < 0.5 or n < 4:  # Troca de duas posições
+                b = int(rand() * n)
+                if a != b and self._swap_ok(order, allowed, a, b):
+                    order[a], order[b] = order[b], order[a]
+                    self.accepted += 1
+            else:  # Inversão do trecho de tamanho L a partir de a (dando a volta no fim da sequência)
+                length = 2 + int(rand() * (n - 3))
+                if self._reversal_ok(order, allowed, a, length):
+                    self._reverse(order, a, length)
+                    self.accepted += 1
+
+        self.steps += n
+
+    @staticmethod
+    def _successors(order: List[int]) -> List[int]:
+        successors = [0] * len(order)
+        for p in range(len(order)):
+            successors[order[p - 1]] = order[p]
+
+        return successors
+
+    @staticmethod
+    def _swap_ok(order: List[int], allowed: List[int], a: int, b: int) -> bool:
+        # Só mudam as arestas que entram e saem das duas posições; checa cada uma com a troca já aplicada
+        n = len(order)
+        at = lambda p: order[b] if p == a else order[a] if p == b else order[p]
+        for p in {(a - 1) % n, a, (b - 1) % n, b}:
+            if not allowed[at(p)] >> at((p + 1) % n) & 1:
+                return False
+
+        return True
+
+    @staticmethod
+    def _reversal_ok(order: List[int], allowed: List[int], a: int, length: int) -> bool:
+        # Antes -> x, s1, ..., sL, y; depois -> x, sL, ..., s1, y (todas as arestas internas invertem de sentido)
+        n = len(order)
+        first = order[a]
+        last = order[(a + length - 1) % n]
+        if not (allowed[order[(a - 1) % n]] >> last & 1 and allowed[first] >> order[(a + length) % n] & 1):
+            return False
+
+        for p in range(a, a + length - 1):
+            if not allowed[order[(p + 1) % n]] >> order[p % n] & 1:
+                return False
+
+        return True
+
+    @staticmethod
+    def _reverse(order: List[int], a: int, length: int) -> None:
+        n = len(order)
+        i = a
+        j = a + length - 1
+        while i < j:
+            order[i % n], order[j % n] = order[j % n], order[i % n]
+            i += 1
+            j -= 1
@@ -0,0 +1,144 @@
+import os
+import copy
+import time
+import multiprocessing as mp
+from queue import Empty
+from typing import List, Optional
+from .base import BaseDrawer
+from .compiled import CompiledRestrictions
+from .dfs import DFSDrawer
+from .las_vegas import LasVegasDrawer
+from .matching import MatchingDrawer
+from .vectorized import VectorizedLasVegasDrawer
+from ..exceptions import DrawTimeoutException
+
+
+def _get_context():
+    # forkserver evita herdar threads do processo pai (ex.: Streamlit) e, com o preload, sobe rápido
+    if "forkserver" in mp.get_all_start_methods():
+        ctx = mp.get_context("forkserver")
+        ctx.set_forkserver_preload(["src.drawers"])
+        return ctx
+
+    return mp.get_context("spawn")
+
+
+def _run_strategy(idx: int, drawer: BaseDrawer, compiled: CompiledRestrictions, seed: int, queue):
+    drawer._reseed(seed)
+    try:
+        queue.put((idx, drawer._draw(compiled), None))
+    except Exception as e:
+        queue.put((idx, None, e))
+
+
+def _for_worker(drawer: BaseDrawer) -> BaseDrawer:
+    # A instrumentação guarda locks (DrawMetrics) que não atravessam o pickle, e as medições do outro
+    # processo se perderiam de qualquer jeito: o worker recebe uma cópia sem ela
+    clone = copy.copy(drawer)
+    clone._instrumented = False
+    clone._metrics = None
+    clone._profiler = None
+    clone.last_stats = None
+    return clone
+
+
+class PortfolioDrawer(BaseDrawer):
+    """Executa várias estratégias (e sementes) em paralelo, cada uma em um processo.
+    O primeiro resultado válido vence e os demais processos são encerrados na hora.
+
+    Se houver uma estratégia polinomial (ex.: emparelhamento), ela roda sozinha no próprio processo: em
+    entrada viável nenhuma outra chega antes dela e a falha dela já prova que não há solução, então subir
+    processos só custaria tempo. A corrida fica para quando não há uma (ex.: cycle=True)."""
+
+    def __init__(
+        self,
+        strategies: Optional[List[BaseDrawer]] = None,
+        seeds_per_strategy: int = 1,
+        max_workers: Optional[int] = None,
+        timeout: float = 30,
+        cycle: bool = False,
+        precheck: bool = True,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(precheck=precheck, seed=seed)
+
+        if strategies is None:
+            if cycle:
+                strategies = [DFSDrawer(precheck=False)]
+                seeds_per_strategy = max(seeds_per_strategy, 2)  # Mesma busca, sementes diferentes
+            else:
+                strategies = [MatchingDrawer(precheck=False), LasVegasDrawer(timeout=timeout, precheck=False),
+                              VectorizedLasVegasDrawer(timeout=timeout, precheck=False), DFSDrawer(precheck=False)]
+
+        if cycle and not all(s.requires_cycle for s in strategies):
+            raise ValueError("Com cycle=True todas as estratégias devem garantir um ciclo único.")
+
+        self.requires_cycle = cycle
+        self._strategies = strategies
+        self._seeds_per_strategy = seeds_per_strategy
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._timeout = timeout
+        self.winner = None  # (classe da estratégia vencedora, semente)
+
+    def _repair(self, compiled: CompiledRestrictions, partial: List[int]) -> Optional[List[int]]:
+        if self.requires_cycle:
+            strategy = self._strategies[0]
+            strategy._reseed(self._rng.getrandbits(64))
+            return strategy._repair(compiled, partial)
+
+        return super()._repair(compiled, partial)
+
+    def _draw(self, compiled: CompiledRestrictions) -> List[int]:
+        # Intercala as estratégias para que todas rodem mesmo com poucos workers
+        polynomial = next((s for s in self._strategies if s.polynomial), None)
+        if polynomial is not None:
+            runs = [(polynomial, self._rng.getrandbits(64))]
+        else:
+            runs = [(s, self._rng.getrandbits(64)) for _ in range(self._seeds_per_strategy) for s in self._strategies]
+            runs = runs[:self._max_workers]
+
+        if len(runs) == 1:
+            drawer, seed = runs[0]
+            drawer._reseed(seed)
+            self.winner = (type(drawer).__name__, seed)
+            return drawer._draw(compiled)
+
+        ctx = _get_context()
+        queue = ctx.Queue()
+        processes = [
+            ctx.Process(target=_run_strategy, args=(idx, _for_worker(drawer), compiled, seed, queue), daemon=True)
+            for idx, (drawer, seed) in enumerate(runs)
+        ]
+
+        started = []
+        try:
+            for p in processes:
+                p.start()
+                started.append(p)
+
+            errors = {}
+            deadline = time.monotonic() + self._timeout
+            while len(errors) < len(runs):
+                try:
+                    idx, result, error = queue.get(timeout=max(0, deadline - time.monotonic()))
+                except Empty:
+                    raise DrawTimeoutException("Nenhuma estratégia convergiu dentro do tempo limite. As restrições podem ser impossíveis de satisfazer.")
+
+                if error is None:
+                    drawer, seed = runs[idx]
+                    self.winner = (type(drawer).__name__, seed)
+                    return result
+
+                errors[idx] = error
+
+            raise errors[min(errors)]  # Todas falharam: reporta o erro da estratégia de maior prioridade
+
+        finally:
+            for p in started:
+                if p.is_alive():
+                    p.terminate()
+
+            for p in started:
+                p.join()
+
+            queue.close()
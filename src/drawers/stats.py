@@ -0,0 +1,107 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, ContextManager, Dict, List, Optional, Tuple
+
+COUNTERS = ("attempts", "expansions", "backtracks", "batches", "steps", "accepted")  # Contadores expostos pelos drawers
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)  # Segundos
+
+
+@dataclass
+class DrawStats:
+    drawer: str
+    n: int
+    phases: Dict[str, float] = field(default_factory=dict)  # Segundos gastos em cada fase
+    counters: Dict[str, int] = field(default_factory=dict)
+    seed: Optional[int] = None
+    outcome: str = "ok"  # "ok" ou o nome da exceção que interrompeu o sorteio
+    finished: bool = False
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+
+class DrawMetrics:
+    """Agrega os DrawStats de vários sorteios (thread-safe) e exporta no formato texto do Prometheus."""
+
+    def __init__(self, prefix: str = "secret_santa"):
+        self._prefix = prefix
+        self._lock = threading.Lock()
+        self._draws: Dict[Tuple[str, str], int] = {}
+        self._phase_seconds: Dict[Tuple[str, str], float] = {}
+        self._counters: Dict[Tuple[str, str], int] = {}
+        self._buckets: Dict[str, List[int]] = {}  # Contagem cumulativa por limite (o último é o +Inf)
+        self._duration_sum: Dict[str, float] = {}
+
+    def observe(self, stats: DrawStats) -> None:
+        total = stats.total
+        with self._lock:
+            key = (stats.drawer, stats.outcome)
+            self._draws[key] = self._draws.get(key, 0) + 1
+
+            for phase, seconds in stats.phases.items():
+                key = (stats.drawer, phase)
+                self._phase_seconds[key] = self._phase_seconds.get(key, 0.0) + seconds
+
+            for counter, value in stats.counters.items():
+                key = (stats.drawer, counter)
+                self._counters[key] = self._counters.get(key, 0) + value
+
+            buckets = self._buckets.setdefault(stats.drawer, [0] * (len(DURATION_BUCKETS) + 1))
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if total <= bound:
+                    buckets[i] += 1
+            buckets[-1] += 1
+            self._duration_sum[stats.drawer] = self._duration_sum.get(stats.drawer, 0.0) + total
+
+    def reset(self) -> None:
+        with self._lock:
+            self._draws.clear()
+            self._phase_seconds.clear()
+            self._counters.clear()
+            self._buckets.clear()
+            self._duration_sum.clear()
+
+    def to_prometheus(self) -> str:
+        p = self._prefix
+        with self._lock:
+            lines = [f"# HELP {p}_draws_total Sorteios realizados por drawer e resultado.", f"# TYPE {p}_draws_total counter"]
+            for (drawer, outcome), value in sorted(self._draws.items()):
+                lines.append(f'{p}_draws_total{{drawer="{drawer}",outcome="{outcome}"}} {value}')
+
+            lines += [f"# HELP {p}_phase_seconds_total Tempo gasto em cada fase do sorteio.", f"# TYPE {p}_phase_seconds_total counter"]
+            for (drawer, phase), value in sorted(self._phase_seconds.items()):
+                lines.append(f'{p}_phase_seconds_total{{drawer="{drawer}",phase="{phase}"}} {value:.6f}')
+
+            lines += [f"# HELP {p}_work_total Tentativas, expansões, retrocessos e passos de cadeia dos drawers.", f"# TYPE {p}_work_total counter"]
+            for (drawer, counter), value in sorted(self._counters.items()):
+                lines.append(f'{p}_work_total{{drawer="{drawer}",counter="{counter}"}} {value}')
+
+            lines += [f"# HELP {p}_draw_duration_seconds Duração total de cada sorteio.", f"# TYPE {p}_draw_duration_seconds histogram"]
+            for drawer, buckets in sorted(self._buckets.items()):
+                for bound, count in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f'{p}_draw_duration_seconds_bucket{{drawer="{drawer}",le="{bound}"}} {count}')
+                lines.append(f'{p}_draw_duration_seconds_bucket{{drawer="{drawer}",le="+Inf"}} {buckets[-1]}')
+                lines.append(f'{p}_draw_duration_seconds_sum{{drawer="{drawer}"}} {self._duration_sum[drawer]:.6f}')
+                lines.append(f'{p}_draw_duration_seconds_count{{drawer="{drawer}"}} {buckets[-1]}')
+
+        return "\n".join(lines) + "\n"
+
+
+METRICS = DrawMetrics()  # Registro padrão do processo
+
+
+def cprofile_hook(profile) -> Callable[[str], ContextManager]:
+    """Gancho de profiling que liga um cProfile.Profile apenas durante cada fase."""
+
+    class _Phase:
+        def __init__(self, phase: str):
+            self.phase = phase
+
+        def __enter__(self):
+            profile.enable()
+
+        def __exit__(self, *exc):
+            profile.disable()
+
+    return _Phase
@@ -0,0 +1,37 @@
+from typing import List
+from .compiled import CompiledRestrictions
+from ..domain.restrictions import GroupRestrictions, Restrictions
+from ..exceptions import InvalidRestrictionsException
+
+
+def validate_restrictions(participants: List[str], restrictions: Restrictions):
+    if isinstance(restrictions, GroupRestrictions):  # Grupos já são validados na construção do modelo
+        missing = [p for p in participants if p not in restrictions]
+        if missing:
+            raise InvalidRestrictionsException(f"Participantes sem restrições definidas: {', '.join(missing)}")
+
+        return
+
+    participants_set = set(participants)
+    missing = participants_set - restrictions.keys()
+    if missing:
+        raise InvalidRestrictionsException(f"Participantes sem restrições definidas: {', '.join(missing)}")
+
+    for p in participants:
+        r = restrictions[p]
+
+        if not isinstance(r, set):
+            raise TypeError(f"As restrições de '{p}' devem ser do tipo set.")
+
+        if p not in r:
+            raise InvalidRestrictionsException(f"'{p}' deve estar em sua própria lista de restrições.")
+
+        invalid = r - participants_set
+        if invalid:
+            raise InvalidRestrictionsException(f"Restrições inválidas para '{p}': {', '.join(invalid)} não existe(m) nos participantes.")
+
+
+def validate_compiled(compiled: CompiledRestrictions):
+    for i, mask in enumerate(compiled.allowed):
+        if not mask:
+            raise InvalidRestrictionsException(f"'{compiled.names[i]}' não pode tirar ninguém (restrições impossíveis).")
@@ -0,0 +1,72 @@
+import time
+import numpy as np
+from typing import List, Optional
+from .base import BaseDrawer
+from .compiled import CompiledRestrictions
+from ..exceptions import DrawTimeoutException
+
+class VectorizedLasVegasDrawer(BaseDrawer):
+    """Las Vegas em lotes com NumPy: gera `batch_size` permutações aleatórias de uma vez, tenta corrigir as
+    violações com trocas aleatórias entre pares de posições e devolve a primeira atribuição válida."""
+
+    def __init__(
+        self,
+        timeout: float = 30,
+        batch_size: int = 1024,
+        repair_rounds: int = 32,
+        max_batch_cells: int = 1_000_000,
+        precheck: bool = True,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(precheck=precheck, seed=seed)
+        self._timeout = timeout
+        self._batch_size = batch_size
+        self._repair_rounds = repair_rounds  # Rodadas de trocas entre pares por lote
+        self._max_batch_cells = max_batch_cells  # Limita memória: batch_size * n
+        self.batches = 0
+
+    def _draw(self, compiled: CompiledRestrictions) -> List[int]:
+        n = compiled.n
+        allowed = self._allowed_matrix(compiled)  # Matriz booleana construída uma única vez
+        batch_size = max(1, min(self._batch_size, self._max_batch_cells // n))
+
+        rng = np.random.default_rng(self._rng.getrandbits(64))
+        positions = np.arange(n)
+        identity = np.tile(np.arange(n, dtype=np.intp), (batch_size, 1))
+        half = n // 2
+
+        self.batches = 0
+        start_time = time.monotonic()
+        while True:
+            if time.monotonic() - start_time > self._timeout:
+                raise DrawTimeoutException("Sorteio não convergiu dentro do tempo limite. As restrições podem ser impossíveis de satisfazer.")
+
+            self.batches += 1
+            candidates = rng.permuted(identity, axis=1)  # Cada linha é uma atribuição candidata
+            ok = allowed[positions, candidates]
+
+            for _ in range(self._repair_rounds):
+                if ok.all(axis=1).any():
+                    break
+
+                # Pareia posições aleatoriamente e troca os recebedores quando isso resolve alguma violação
+                pairing = rng.permutation(n)
+                i, j = pairing[:half], pairing[half:2 * half]
+                ci, cj = candidates[:, i], candidates[:, j]
+                swap = (~ok[:, i] | ~ok[:, j]) & allowed[i, cj] & allowed[j, ci]
+
+                candidates[:, i] = np.where(swap, cj, ci)
+                candidates[:, j] = np.where(swap, ci, cj)
+                ok[:, i] |= swap
+                ok[:, j] |= swap
+
+            valid = np.flatnonzero(ok.all(axis=1))
+            if valid.size:
+                return candidates[valid[0]].tolist()
+
+    def _allowed_matrix(self, compiled: CompiledRestrictions) -> np.ndarray:
+        n = compiled.n
+        n_bytes = (n + 7) // 8
+        packed = b"".join(mask.to_bytes(n_bytes, "little") for mask in compiled.allowed)
+        rows = np.frombuffer(packed, dtype=np.uint8).reshape(n, n_bytes)
+        return np.unpackbits(rows, axis=1, count=n, bitorder="little").astype(bool)
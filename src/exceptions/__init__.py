@@ -1,3 +1,4 @@
-from .draw_exceptions import DrawException, DrawTimeoutException, InvalidRestrictionsException, NoValidCycleException
+from .draw_exceptions import DrawException, DrawTimeoutException, InfeasibleRestrictionsException, InvalidRestrictionsException, NoValidCycleException, NoValidMatchingException
+from .waha_exceptions import CircuitOpenException, WAHAException
 
-__all__ = ["DrawException", "DrawTimeoutException", "InvalidRestrictionsException", "NoValidCycleException"]
+__all__ = ["DrawException", "DrawTimeoutException", "InfeasibleRestrictionsException", "InvalidRestrictionsException", "NoValidCycleException", "NoValidMatchingException", "CircuitOpenException", "WAHAException"]
@@ -14,4 +14,20 @@ class DrawTimeoutException(DrawException):
 
 class InvalidRestrictionsException(DrawException):
     """Restrições inválidas ou impossíveis."""
-    pass
\ No newline at end of file
+    pass
+
+
+class InfeasibleRestrictionsException(InvalidRestrictionsException):
+    """Restrições comprovadamente impossíveis; conflict traz o grupo de participantes que causa o conflito."""
+
+    def __init__(self, message: str, conflict: list):
+        super().__init__(message)
+        self.conflict = conflict
+
+    def __reduce__(self):  # Permite trafegar entre processos
+        return type(self), (str(self), self.conflict)
+
+
+class NoValidMatchingException(DrawException):
+    """Não existe atribuição (doador -> recebedor) que respeite as restrições."""
+    pass
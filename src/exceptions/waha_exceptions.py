@@ -0,0 +1,11 @@
+class WAHAException(Exception):
+    """Exceção base para erros de comunicação com o WAHA."""
+    pass
+
+
+class CircuitOpenException(WAHAException):
+    """Circuito aberto: o WAHA falhou seguidamente e as chamadas são recusadas até o próximo teste."""
+
+    def __init__(self, message: str, retry_in: float):
+        super().__init__(message)
+        self.retry_in = retry_in
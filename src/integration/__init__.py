@@ -1,3 +1,7 @@
-from .waha import WAHA
+from .waha import WAHA, WAHA_METRICS, CircuitBreaker, RetryPolicy, TransportMetrics, WAHATransport
+from .async_waha import AsyncWAHA
+from .delivery import DeliveryResult, OutgoingMessage, TokenBucket, send_all
+from .outbox import Outbox, deliver_with_outbox
+from .webhook import WebhookReceiver
 
-__all__ = ["WAHA"]
+__all__ = ["WAHA", "WAHA_METRICS", "CircuitBreaker", "RetryPolicy", "TransportMetrics", "WAHATransport", "AsyncWAHA", "DeliveryResult", "OutgoingMessage", "TokenBucket", "send_all", "Outbox", "deliver_with_outbox", "WebhookReceiver"]
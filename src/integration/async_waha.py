@@ -0,0 +1,31 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from .waha import WAHA
+
+class AsyncWAHA:
+    """Interface asyncio sobre o cliente WAHA. As chamadas HTTP (bloqueantes) rodam em um pool de threads
+    dedicado e limitado, então várias requisições podem ficar em voo ao mesmo tempo sem travar o event loop."""
+
+    def __init__(self, waha: WAHA, max_workers: int = 8):
+        self._waha = waha
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="waha")
+
+    async def __aenter__(self) -> "AsyncWAHA":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _call(self, fn, *args) -> Tuple[int, Optional[Dict[str, Any]]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def get_session_status(self) -> Tuple[int, Optional[Dict[str, Any]]]:
+        return await self._call(self._waha.get_session_status)
+
+    async def send_msg(self, phone_number, content) -> Tuple[int, Optional[Dict[str, Any]]]:
+        return await self._call(self._waha.send_msg, phone_number, content)
@@ -0,0 +1,104 @@
+import time
+import random
+import asyncio
+from dataclasses import dataclass
+from typing import Callable, FrozenSet, Iterable, List, Optional
+from .async_waha import AsyncWAHA
+from .waha import RetryPolicy
+
+
+@dataclass(frozen=True)
+class OutgoingMessage:
+    recipient: str
+    phone: str
+    text: str
+
+
+@dataclass
+class DeliveryResult:
+    recipient: str
+    phone: str
+    delivered: bool
+    attempts: int
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+class TokenBucket:
+    """Limita a taxa de envio: no máximo `rate` mensagens por segundo, com rajadas de até `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[int] = None):
+        self._rate = rate
+        self._capacity = capacity or max(1, int(rate))
+        self._tokens = float(self._capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:  # Fila justa: quem chegou antes é atendido antes
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+async def send_all(
+    client: AsyncWAHA,
+    messages: Iterable[OutgoingMessage],
+    concurrency: int = 8,
+    rate: float = 5.0,
+    max_retries: int = 3,
+    backoff: float = 1.0,
+    on_result: Optional[Callable[[DeliveryResult], None]] = None,
+    transport_retried: FrozenSet[int] = RetryPolicy.always_retry,
+) -> List[DeliveryResult]:
+    """Envia as mensagens com no máximo `concurrency` requisições simultâneas e `rate` envios por segundo.
+    Cada mensagem agenda as próprias tentativas, então uma falha não atrasa as demais.
+    `on_result` é chamado assim que cada mensagem termina (entregue ou não).
+
+    Só vale tentar de novo erros de rede, 429 e 5xx; os demais 4xx (número inválido, sessão fora de
+    WORKING...) nunca vão dar certo. Os status de `transport_retried` já são repetidos com backoff pelo
+    WAHATransport, então chegam aqui esgotados e não são repetidos de novo (senão as tentativas se multiplicam)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rate)
+
+    async def deliver(msg: OutgoingMessage) -> DeliveryResult:
+        result = DeliveryResult(msg.recipient, msg.phone, delivered=False, attempts=0)
+        start = time.monotonic()
+
+        for attempt in range(max_retries + 1):
+            if attempt:  # Backoff exponencial com jitter, fora do semáforo para liberar a vaga
+                await asyncio.sleep(backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+            await bucket.acquire()
+            async with semaphore:
+                result.attempts += 1
+                try:
+                    result.status_code, _ = await client.send_msg(msg.phone, msg.text)
+                    result.error = None
+                except Exception as e:  # Erros de rede entram no retry como qualquer outra falha
+                    result.status_code = None
+                    result.error = str(e)
+
+            status_code = result.status_code
+            if status_code is not None and 200 <= status_code < 300:
+                result.delivered = True
+                break
+
+            if status_code is not None and (status_code in transport_retried or not (status_code == 429 or status_code >= 500)):
+                break
+
+        result.elapsed = time.monotonic() - start
+        if on_result is not None:
+            on_result(result)
+
+        return result
+
+    return await asyncio.gather(*(deliver(m) for m in messages))
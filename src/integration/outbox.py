@@ -0,0 +1,151 @@
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Iterable, List, Optional, Tuple
+from .async_waha import AsyncWAHA
+from .delivery import DeliveryResult, OutgoingMessage, send_all
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS draws (
+    draw_id     TEXT PRIMARY KEY,
+    description TEXT NOT NULL,
+    created_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    draw_id      TEXT NOT NULL REFERENCES draws(draw_id),
+    recipient    TEXT NOT NULL,
+    phone        TEXT NOT NULL,
+    message_hash TEXT NOT NULL,
+    payload      TEXT,            -- Apagado assim que a mensagem é entregue
+    status       TEXT NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    updated_at   REAL NOT NULL,
+    PRIMARY KEY (draw_id, recipient)
+);
+CREATE INDEX IF NOT EXISTS outbox_status ON outbox (draw_id, status);
+"""
+
+
+def message_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class Outbox:
+    """Diário local (SQLite) dos envios de cada sorteio, para retomar envios interrompidos sem reenviar
+    para quem já recebeu."""
+
+    def __init__(self, path: str = "outbox.sqlite3"):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def enqueue(self, draw_id: str, description: str, messages: Iterable[OutgoingMessage]) -> None:
+        now = time.time()
+        rows = [(draw_id, m.recipient, m.phone, message_hash(m.text), m.text, PENDING, now) for m in messages]
+
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO draws VALUES (?, ?, ?)", (draw_id, description, now))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO outbox (draw_id, recipient, phone, message_hash, payload, status, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+            # Um mesmo sorteio nunca pode gerar mensagens diferentes para a mesma pessoa
+            expected = {r[1]: r[3] for r in rows}
+            stored = self._conn.execute("SELECT recipient, message_hash FROM outbox WHERE draw_id = ?", (draw_id,))
+            changed = [recipient for recipient, h in stored if expected.get(recipient, h) != h]
+            if changed:
+                raise ValueError(f"Mensagens do sorteio {draw_id} mudaram para: {', '.join(changed)}")
+
+    def mark(self, draw_id: str, results: Iterable[DeliveryResult]) -> None:
+        # Idempotente: marcar de novo não altera nada e quem já foi entregue nunca volta a pendente
+        now = time.time()
+        rows = [
+            (SENT if r.delivered else FAILED, r.attempts, r.delivered, now, draw_id, r.recipient)
+            for r in results
+        ]
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET status = ?, attempts = attempts + ?, "
+                "payload = CASE WHEN ? THEN NULL ELSE payload END, updated_at = ? "
+                f"WHERE draw_id = ? AND recipient = ? AND status != '{SENT}'",
+                rows,
+            )
+
+    def pending(self, draw_id: str) -> List[OutgoingMessage]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT recipient, phone, payload FROM outbox WHERE draw_id = ? AND status != '{SENT}' ORDER BY rowid",
+                (draw_id,),
+            ).fetchall()
+
+        return [OutgoingMessage(*r) for r in rows]
+
+    def pending_draws(self) -> List[Tuple[str, str, int]]:
+        """(draw_id, descrição, quantidade pendente) dos sorteios com envios não concluídos."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT d.draw_id, d.description, COUNT(*) FROM outbox o JOIN draws d USING (draw_id) "
+                f"WHERE o.status != '{SENT}' GROUP BY d.draw_id ORDER BY d.created_at"
+            ).fetchall()
+
+    def recorder(self, draw_id: str, batch_size: int = 20) -> "OutboxRecorder":
+        return OutboxRecorder(self, draw_id, batch_size)
+
+
+class OutboxRecorder:
+    """Grava os resultados de envio no diário. Entregas são gravadas na hora: uma entrega ainda no buffer se
+    perderia numa queda e seria reenviada ao retomar. Só as falhas (que serão tentadas de novo de qualquer
+    jeito) são acumuladas em lotes de `batch_size` (e no final, via flush/with)."""
+
+    def __init__(self, outbox: Outbox, draw_id: str, batch_size: int):
+        self._outbox = outbox
+        self._draw_id = draw_id
+        self._batch_size = batch_size
+        self._buffer: List[DeliveryResult] = []
+
+    def __call__(self, result: DeliveryResult) -> None:
+        self._buffer.append(result)
+        if result.delivered or len(self._buffer) >= self._batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._outbox.mark(self._draw_id, self._buffer)
+            self._buffer = []
+
+    def __enter__(self) -> "OutboxRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.flush()
+
+
+async def deliver_with_outbox(
+    outbox: Outbox,
+    draw_id: str,
+    client: AsyncWAHA,
+    messages: Optional[Iterable[OutgoingMessage]] = None,
+    description: str = "",
+    batch_size: int = 20,
+    **send_kwargs,
+) -> List[DeliveryResult]:
+    """Registra as mensagens (se informadas) e envia apenas as que ainda estão pendentes no diário.
+    Chamar sem `messages` retoma um envio interrompido."""
+    if messages is not None:
+        outbox.enqueue(draw_id, description, messages)
+
+    pending = outbox.pending(draw_id)
+    with outbox.recorder(draw_id, batch_size) as record:
+        return await send_all(client, pending, on_result=record, **send_kwargs)
@@ -1,5 +1,335 @@
+import time
+import random
+import threading
 import requests
-from typing import Any, Optional, Dict, Tuple
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+from requests.adapters import HTTPAdapter
+from .webhook import WebhookReceiver
+from ..exceptions import CircuitOpenException
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # Segundos
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Backoff exponencial com jitter completo (espera aleatória entre 0 e base * 2^tentativa, limitada a
+    `cap`). Se o servidor mandar `Retry-After`, esperamos pelo menos o que ele pediu."""
+
+    max_retries: int = 3
+    base: float = 0.5
+    cap: float = 30.0
+    max_retry_after: float = 60.0  # Pedidos de espera maiores que isso voltam para quem chamou, sem retry
+    retry_statuses: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+    # 429 e 503 garantem que nada foi processado: valem para qualquer método. Os demais (e erros de rede)
+    # só para métodos idempotentes, senão um POST /sendText poderia mandar a mesma mensagem duas vezes
+    always_retry: FrozenSet[int] = frozenset({429, 503})
+    idempotent: FrozenSet[str] = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+
+    def should_retry(self, method: str, status_code: Optional[int]) -> bool:
+        if status_code is None:  # Erro de rede
+            return method in self.idempotent
+
+        if status_code in self.always_retry:
+            return True
+
+        return status_code in self.retry_statuses and method in self.idempotent
+
+    def delay(self, attempt: int, rng: random.Random, retry_after: Optional[float] = None) -> float:
+        jitter = rng.uniform(0, min(self.cap, self.base * 2 ** attempt))
+        if retry_after is None:
+            return jitter
+
+        return max(retry_after, jitter)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After pode vir em segundos ("120") ou como data HTTP ("Wed, 21 Oct 2015 07:28:00 GMT")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Depois de `failure_threshold` falhas seguidas o circuito abre e as chamadas são recusadas na hora
+    (sem ocupar conexões nem esperar timeouts). Passados `reset_timeout` segundos, uma única chamada de
+    teste é liberada: se der certo o circuito fecha, senão abre de novo."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False  # Já existe uma chamada de teste em voo (meio aberto)
+        self.opened = 0  # Quantas vezes o circuito abriu
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self._reset_timeout:
+                return self.HALF_OPEN
+
+            return self._state
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+
+            retry_in = self._opened_at + self._reset_timeout - self._clock()
+            if self._state == self.OPEN and retry_in <= 0:
+                self._state = self.HALF_OPEN
+                self._probing = False
+
+            if self._state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+
+            raise CircuitOpenException(
+                f"WAHA indisponível após {self._failures} falha(s) seguida(s). Nova tentativa em {max(retry_in, 0):.1f} s.",
+                max(retry_in, 0.0),
+            )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.OPEN:  # Respostas atrasadas de chamadas antigas não adiam o próximo teste
+                return
+
+            if self._state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+                self.opened += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probing = False
+
+    def release(self) -> None:
+        # Chamada terminou sem registrar sucesso nem falha (ex.: exceção inesperada): libera o teste
+        with self._lock:
+            self._probing = False
+
+
+class TransportMetrics:
+    """Histogramas de latência e contagem de erros/retries por endpoint (thread-safe), no formato texto do
+    Prometheus. Os endpoints usam o caminho com o nome da sessão trocado por {session}."""
+
+    def __init__(self, prefix: str = "waha"):
+        self._prefix = prefix
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, List[int]] = {}  # Contagem cumulativa por limite (o último é o +Inf)
+        self._latency_sum: Dict[str, float] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}  # (endpoint, status ou nome da exceção)
+        self._retries: Dict[str, int] = {}
+        self._rejected: Dict[str, int] = {}  # Recusadas pelo circuito aberto
+
+    def observe(self, endpoint: str, seconds: float, error: Optional[str] = None) -> None:
+        with self._lock:
+            buckets = self._buckets.setdefault(endpoint, [0] * (len(LATENCY_BUCKETS) + 1))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            buckets[-1] += 1
+            self._latency_sum[endpoint] = self._latency_sum.get(endpoint, 0.0) + seconds
+
+            if error is not None:
+                key = (endpoint, error)
+                self._errors[key] = self._errors.get(key, 0) + 1
+
+    def retried(self, endpoint: str) -> None:
+        with self._lock:
+            self._retries[endpoint] = self._retries.get(endpoint, 0) + 1
+
+    def rejected(self, endpoint: str) -> None:
+        with self._lock:
+            self._rejected[endpoint] = self._rejected.get(endpoint, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": buckets[-1],
+                    "mean_latency": self._latency_sum[endpoint] / buckets[-1],
+                    "errors": {e: c for (ep, e), c in self._errors.items() if ep == endpoint},
+                    "retries": self._retries.get(endpoint, 0),
+                    "rejected": self._rejected.get(endpoint, 0),
+                }
+                for endpoint, buckets in self._buckets.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self._latency_sum.clear()
+            self._errors.clear()
+            self._retries.clear()
+            self._rejected.clear()
+
+    def to_prometheus(self) -> str:
+        p = self._prefix
+        with self._lock:
+            lines = [f"# HELP {p}_request_duration_seconds Latência de cada requisição ao WAHA.", f"# TYPE {p}_request_duration_seconds histogram"]
+            for endpoint, buckets in sorted(self._buckets.items()):
+                for bound, count in zip(LATENCY_BUCKETS, buckets):
+                    lines.append(f'{p}_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+                lines.append(f'{p}_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {buckets[-1]}')
+                lines.append(f'{p}_request_duration_seconds_sum{{endpoint="{endpoint}"}} {self._latency_sum[endpoint]:.6f}')
+                lines.append(f'{p}_request_duration_seconds_count{{endpoint="{endpoint}"}} {buckets[-1]}')
+
+            lines += [f"# HELP {p}_request_errors_total Respostas de erro e falhas de rede por endpoint.", f"# TYPE {p}_request_errors_total counter"]
+            for (endpoint, error), value in sorted(self._errors.items()):
+                lines.append(f'{p}_request_errors_total{{endpoint="{endpoint}",error="{error}"}} {value}')
+
+            lines += [f"# HELP {p}_retries_total Novas tentativas por endpoint.", f"# TYPE {p}_retries_total counter"]
+            for endpoint, value in sorted(self._retries.items()):
+                lines.append(f'{p}_retries_total{{endpoint="{endpoint}"}} {value}')
+
+            lines += [f"# HELP {p}_rejected_total Chamadas recusadas com o circuito aberto.", f"# TYPE {p}_rejected_total counter"]
+            for endpoint, value in sorted(self._rejected.items()):
+                lines.append(f'{p}_rejected_total{{endpoint="{endpoint}"}} {value}')
+
+        return "\n".join(lines) + "\n"
+
+
+WAHA_METRICS = TransportMetrics()  # Registro padrão do processo
+
+
+class WAHATransport:
+    """Transporte HTTP do WAHA: uma requests.Session com pool de conexões keep-alive (cabeçalhos montados
+    uma vez), retries com backoff e Retry-After, circuit breaker e métricas por endpoint. Pode ser
+    compartilhado entre threads (ex.: o pool do AsyncWAHA)."""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        timeout: float = 60,
+        pool_size: int = 16,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        metrics: Optional[TransportMetrics] = WAHA_METRICS,
+        seed: Optional[int] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._base_url = base_url
+        self._timeout = timeout
+        self._retry = retry or RetryPolicy()
+        self._breaker = breaker or CircuitBreaker()
+        self._metrics = metrics
+        self._rng = random.Random(seed)  # Jitter próprio (não disputa o gerador global)
+        self._rng_lock = threading.Lock()
+        self._sleep = sleep
+
+        self._session = requests.Session()
+        self._session.headers.update({"accept": "application/json", "X-Api-Key": api_key})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)  # Retry é feito aqui
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def __enter__(self) -> "WAHATransport":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self._breaker
+
+    def close(self) -> None:
+        self._session.close()
+
+    def request(
+        self, method: str, path: str, payload: Optional[dict] = None, endpoint: Optional[str] = None
+    ) -> Tuple[int, Optional[Dict[str, Any]]]:
+        endpoint = endpoint or path
+        attempt = 0
+        while True:
+            try:
+                self._breaker.before_call()
+            except CircuitOpenException:
+                if self._metrics is not None:
+                    self._metrics.rejected(endpoint)
+                raise
+
+            start = time.perf_counter()
+            try:
+                response = self._session.request(method, f"{self._base_url}{path}", json=payload, timeout=self._timeout)
+            except requests.exceptions.RequestException as e:
+                self._record(endpoint, start, type(e).__name__, failed=True)
+                if attempt >= self._retry.max_retries or not self._retry.should_retry(method, None):
+                    raise
+
+                self._backoff(endpoint, attempt, None)
+                attempt += 1
+                continue
+            except BaseException:
+                self._breaker.release()  # Erro inesperado: sem isso o teste ficaria preso e o circuito nunca fecharia
+                raise
+
+            status_code = response.status_code
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            # 429 com Retry-After é controle de fluxo (o servidor está de pé), não falha; sem ele, conta como
+            # falha. 4xx comuns (ex.: 422) são respostas válidas
+            failed = status_code >= 500 or (status_code == 429 and retry_after is None)
+            self._record(endpoint, start, str(status_code) if status_code >= 400 else None, failed)
+
+            if (
+                attempt < self._retry.max_retries
+                and self._retry.should_retry(method, status_code)
+                and (retry_after is None or retry_after <= self._retry.max_retry_after)
+            ):
+                response.close()  # Devolve a conexão ao pool antes de esperar
+                self._backoff(endpoint, attempt, retry_after)
+                attempt += 1
+                continue
+
+            try:
+                content = response.json()
+            except requests.exceptions.JSONDecodeError:
+                content = None
+
+            return status_code, content
+
+    def _record(self, endpoint: str, start: float, error: Optional[str], failed: bool) -> None:
+        if self._metrics is not None:
+            self._metrics.observe(endpoint, time.perf_counter() - start, error)
+
+        if failed:
+            self._breaker.record_failure()
+        else:
+            self._breaker.record_success()
+
+    def _backoff(self, endpoint: str, attempt: int, retry_after: Optional[float]) -> None:
+        if self._metrics is not None:
+            self._metrics.retried(endpoint)
+
+        with self._rng_lock:
+            delay = self._retry.delay(attempt, self._rng, retry_after)
+
+        self._sleep(delay)
+
 
 class WAHA:
     def __init__(
@@ -9,38 +339,44 @@ class WAHA:
         api_port: int,
         session_name: str = "default",
         timeout: int = 60,
+        events: Optional[WebhookReceiver] = None,
+        transport: Optional[WAHATransport] = None,
     ):
         self._session_name = session_name
         self._base_url = f"http://{host}:{api_port}"
         self._api_key = api_key
         self._timeout = timeout
+        self._events = events  # Se informado, os status da sessão chegam por webhook
+        self._transport = transport or WAHATransport(self._base_url, api_key, timeout=timeout)
+
+    def close(self) -> None:
+        self._transport.close()
 
     def _process_response(
         self, method: str, endpoint: str, payload: Optional[dict] = None
     ) -> Tuple[int, Optional[Dict[str, Any]]]:
-        headers = {
-            "accept": "application/json",
-            "X-Api-Key": self._api_key,
-        }
-
-        response = requests.request(
-            method=method,
-            url=f"{self._base_url}{endpoint}",
-            headers=headers,
-            json=payload,
-            timeout=self._timeout,
-        )
+        # Métricas por rota, e não por sessão: /api/sessions/default/start -> /api/sessions/{session}/start
+        label = endpoint.replace(f"/{self._session_name}", "/{session}")
+        return self._transport.request(method, endpoint, payload, endpoint=label)
 
-        try:
-            content = response.json()
-        except requests.exceptions.JSONDecodeError:
-            content = None
+    def _session_config(self) -> Dict[str, Any]:
+        if self._events is None:
+            return {}
+
+        webhook = {"url": self._events.url, "events": ["session.status"]}
+        if self._events.hmac_key is not None:
+            webhook["hmac"] = {"key": self._events.hmac_key}  # O WAHA passa a assinar os eventos
 
-        return response.status_code, content
+        return {"webhooks": [webhook]}
 
     def create_session(self):
         return self._process_response(
-            "POST", "/api/sessions", payload={"name": self._session_name}
+            "POST", "/api/sessions", payload={"name": self._session_name, "config": self._session_config()}
+        )
+
+    def update_session(self):
+        return self._process_response(
+            "PUT", f"/api/sessions/{self._session_name}", payload={"config": self._session_config()}
         )
 
     def start_session(self) -> Dict[str, Any]:
@@ -67,10 +403,46 @@ class WAHA:
 
     def stop_session(self) -> Dict[str, Any]:
         return self._process_response(
-            "POST" f"/api/sessions/{self._session_name}/stop",
+            "POST", f"/api/sessions/{self._session_name}/stop",
         )
 
     def logout_session(self) -> Dict[str, Any]:
         return self._process_response(
             "POST", f"/api/sessions/{self._session_name}/logout"
         )
+
+    def wait_for_status(self, statuses: Set[str], timeout: float = 120, poll_interval: Optional[float] = None) -> str:
+        """Espera a sessão chegar em um dos `statuses`. Com webhook, acorda assim que o evento chega e só
+        consulta a API como garantia a cada `poll_interval`; sem webhook, consulta a cada segundo."""
+        if poll_interval is None:
+            poll_interval = 5.0 if self._events is not None else 1.0
+
+        deadline = time.monotonic() + timeout
+        status = self._poll_status()
+        while status not in statuses:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Sessão não chegou em {', '.join(sorted(statuses))} dentro do tempo limite (último status: {status}).")
+
+            if self._events is not None:
+                status = self._events.wait_for_status(self._session_name, statuses, min(poll_interval, remaining))
+                if status in statuses:
+                    break
+            else:
+                time.sleep(min(poll_interval, remaining))
+
+            status = self._poll_status()
+
+        return status
+
+    def _poll_status(self) -> Optional[str]:
+        try:
+            _, content = self.get_session_status()
+        except (CircuitOpenException, requests.exceptions.RequestException):  # WAHA fora do ar: segue esperando até o prazo
+            return None
+
+        status = (content or {}).get("status")
+        if status and self._events is not None:
+            self._events.publish(self._session_name, status)  # Mantém o cache do webhook atualizado
+
+        return status
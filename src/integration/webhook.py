@@ -0,0 +1,123 @@
+import hmac
+import json
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Set
+
+
+def sign(key: str, body: bytes) -> str:
+    # Mesmo esquema do WAHA: HMAC-SHA512 do corpo, em hexadecimal, no cabeçalho X-Webhook-Hmac
+    return hmac.new(key.encode(), body, hashlib.sha512).hexdigest()
+
+
+class WebhookReceiver:
+    """Servidor HTTP embutido que recebe os eventos do WAHA (webhooks) e acorda quem está esperando
+    por uma mudança de status da sessão, sem precisar consultar a API a cada segundo.
+
+    Por padrão só escuta localmente. Com `hmac_key`, o WAHA assina cada evento (a chave vai na
+    configuração do webhook da sessão) e eventos sem assinatura válida são recusados: sem isso, qualquer
+    um que alcance a porta poderia anunciar a sessão como WORKING."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        path: str = "/waha/events",
+        public_url: Optional[str] = None,
+        hmac_key: Optional[str] = None,
+    ):
+        self._path = path
+        self.hmac_key = hmac_key
+        self._status: Dict[str, str] = {}
+        self._cond = threading.Condition()
+        self._listeners: List[Callable[[dict], None]] = []
+
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != receiver._path:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    body = self.rfile.read(length)
+                except ValueError:
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+
+                if receiver.hmac_key is not None and not hmac.compare_digest(
+                    self.headers.get("X-Webhook-Hmac", ""), sign(receiver.hmac_key, body)
+                ):
+                    self.send_response(401)
+                    self.end_headers()
+                    return
+
+                try:
+                    event = json.loads(body or b"{}")
+                except json.JSONDecodeError:
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+
+                receiver.handle_event(event)
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):  # Silencia o log padrão do http.server
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+        bound_host, bound_port = self._server.server_address[:2]
+        self.url = public_url or f"http://{bound_host}:{bound_port}{path}"  # Endereço que o WAHA deve chamar
+
+    def start(self) -> "WebhookReceiver":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="waha-webhook", daemon=True)
+            self._thread.start()
+
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread = None
+
+    def __enter__(self) -> "WebhookReceiver":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def subscribe(self, listener: Callable[[dict], None]) -> None:
+        self._listeners.append(listener)
+
+    def handle_event(self, event: dict) -> None:
+        if event.get("event") == "session.status":
+            status = (event.get("payload") or {}).get("status")
+            if status:
+                self.publish(event.get("session", "default"), status)
+
+        for listener in self._listeners:
+            listener(event)
+
+    def publish(self, session: str, status: str) -> None:
+        with self._cond:
+            self._status[session] = status
+            self._cond.notify_all()
+
+    def status(self, session: str) -> Optional[str]:
+        with self._cond:
+            return self._status.get(session)
+
+    def wait_for_status(self, session: str, statuses: Set[str], timeout: float) -> Optional[str]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._status.get(session) in statuses, timeout=timeout)
+            return self._status.get(session)
@@ -0,0 +1,326 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from .batch import DRAWERS, build_drawer, build_restrictions, check_event_shape
+from .drawers import METRICS, BaseDrawer, CompiledRestrictions
+from .exceptions import DrawException, InfeasibleRestrictionsException, InvalidRestrictionsException
+
+
+_TIMEOUT = (0.001, None)  # None: limitado pelo timeout do próprio serviço
+
+# Opções que um cliente pode passar para cada drawer: bool, ou (mínimo, máximo) para números. O resto (ex.:
+# strategies do portfólio) fica de fora, e os limites impedem que um pedido fure o timeout e a fila do serviço
+OPTION_LIMITS: Dict[str, Dict[str, Any]] = {
+    "las_vegas": {"timeout": _TIMEOUT},
+    "vectorized": {"timeout": _TIMEOUT, "batch_size": (1, 4096), "repair_rounds": (0, 256), "max_batch_cells": (1, 4_000_000)},
+    "dfs": {"max_expansions": (1, 2_000_000), "mrv_sample": (1, 64)},
+    "matching": {},
+    "mcmc": {"cycle": bool, "sweeps": (1, 100), "max_sweeps": (1, 1000), "tolerance": (0.0, 1.0)},
+    "portfolio": {"timeout": _TIMEOUT, "cycle": bool, "seeds_per_strategy": (1, 4), "max_workers": (1, os.cpu_count() or 1)},
+}
+COMMON_OPTIONS: Dict[str, Any] = {"precheck": bool, "seed": (0, 2 ** 64 - 1)}
+
+
+def clean_options(drawer: str, options: Any, timeout: float) -> Dict[str, Any]:
+    """Confere as opções do pedido contra OPTION_LIMITS: chave desconhecida ou tipo errado levantam
+    ValueError; números fora da faixa são trazidos para dentro dela."""
+    if not isinstance(drawer, str) or drawer not in OPTION_LIMITS:
+        raise ValueError(f"Drawer desconhecido: '{drawer}'. Opções: {', '.join(DRAWERS)}")
+
+    if options is None:
+        return {}
+
+    if not isinstance(options, dict):
+        raise ValueError("'options' deve ser um objeto.")
+
+    limits = {**COMMON_OPTIONS, **OPTION_LIMITS[drawer]}
+    unknown = set(options) - set(limits)
+    if unknown:
+        raise ValueError(f"Opções não permitidas para '{drawer}': {', '.join(sorted(unknown))}")
+
+    cleaned = {}
+    for key, value in options.items():
+        limit = limits[key]
+        if limit is bool:
+            if not isinstance(value, bool):
+                raise ValueError(f"'{key}' deve ser true ou false.")
+
+            cleaned[key] = value
+            continue
+
+        low, high = limit
+        kind = float if isinstance(low, float) else int
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or (kind is int and not isinstance(value, int)):
+            raise ValueError(f"'{key}' deve ser um número{' inteiro' if kind is int else ''}.")
+
+        cleaned[key] = min(max(value, low), timeout if high is None else high)
+
+    return cleaned
+
+
+def content_hash(event: Dict) -> str:
+    # Só o que define o grafo de restrições entra no hash (drawer, descrição etc. não)
+    restrictions = {p: sorted(r) for p, r in (event.get("restrictions") or {}).items()}
+    canonical = json.dumps(
+        [event["participants"], restrictions, event.get("groups"), event.get("pairs")],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class CompiledCache:
+    """LRU de restrições já validadas e pré-processadas, indexadas pelo hash do conteúdo. Pedidos repetidos
+    (ou reenviados) pulam a validação e a compilação."""
+
+    def __init__(self, max_entries: int = 256):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, bool, bool], CompiledRestrictions]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compile(self, key: str, drawer: BaseDrawer, event: Dict) -> Tuple[CompiledRestrictions, bool]:
+        # A verificação de viabilidade depende de o drawer exigir ciclo único e de ela estar ligada, então os
+        # dois fazem parte da chave (um compilado sem precheck não pode ser servido a quem pediu a verificação)
+        full_key = (key, drawer.requires_cycle, drawer.precheck)
+        with self._lock:
+            compiled = self._entries.get(full_key)
+            if compiled is not None:
+                self._entries.move_to_end(full_key)
+                self.hits += 1
+                return compiled, True
+
+            self.misses += 1
+
+        compiled = drawer.compile(event["participants"], build_restrictions(event))  # Fora do lock
+        with self._lock:
+            self._entries[full_key] = compiled
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+        return compiled, False
+
+
+class DrawService:
+    """Serviço HTTP local de sorteios: POST /draw, GET /health, GET /queue e GET /metrics (Prometheus).
+    Os sorteios rodam em um pool limitado de threads; pedidos além de `max_queue` são recusados (503) e os
+    que passam de `timeout` segundos recebem 504. Um sorteio que recebeu 504 já em execução continua ocupando
+    a thread até terminar (nem todo drawer aceita timeout): enquanto todas as threads estiverem presas assim,
+    pedidos novos recebem 503."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        workers: int = 4,
+        max_queue: int = 64,
+        timeout: float = 30,
+        cache_size: int = 256,
+        default_drawer: str = "las_vegas",
+    ):
+        self._workers = workers
+        self._max_queue = max_queue
+        self._timeout = timeout
+        self._default_drawer = default_drawer
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="draw")
+        self._cache = CompiledCache(cache_size)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._abandoned = 0  # Em execução após um 504
+        self._started = time.monotonic()
+
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, code: int, body: Dict) -> None:
+                data = json.dumps(body, ensure_ascii=False).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/metrics":
+                    data = METRICS.to_prometheus().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                elif self.path == "/health":
+                    self._reply(200, service.health())
+                elif self.path == "/queue":
+                    self._reply(200, service.queue())
+                else:
+                    self._reply(404, {"error": "Rota não encontrada."})
+
+            def do_POST(self):
+                if self.path != "/draw":
+                    self._reply(404, {"error": "Rota não encontrada."})
+                    return
+
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    event = json.loads(self.rfile.read(length) or b"{}")
+                except (ValueError, json.JSONDecodeError):
+                    self._reply(400, {"error": "JSON inválido."})
+                    return
+
+                self._reply(*service.handle_draw(event))
+
+            def log_message(self, *args):  # Silencia o log padrão do http.server
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+        bound_host, bound_port = self._server.server_address[:2]
+        self.url = f"http://{bound_host}:{bound_port}"
+
+    def start(self) -> "DrawService":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="draw-service", daemon=True)
+            self._thread.start()
+
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._thread = None
+
+    def __enter__(self) -> "DrawService":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def health(self) -> Dict:
+        return {"status": "ok", "uptime_s": round(time.monotonic() - self._started, 3), "workers": self._workers}
+
+    def queue(self) -> Dict:
+        with self._lock:
+            return {
+                "queued": self._queued,
+                "running": self._running,
+                "abandoned": self._abandoned,
+                "max_queue": self._max_queue,
+                "workers": self._workers,
+                "cache_entries": len(self._cache),
+                "cache_hits": self._cache.hits,
+                "cache_misses": self._cache.misses,
+            }
+
+    def _run(self, event: Dict) -> Dict:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+
+        try:
+            start = time.perf_counter()
+            drawer = build_drawer(event.get("drawer", self._default_drawer), event.get("options"), self._timeout)
+            drawer.instrument(METRICS)
+            compiled, cached = self._cache.get_or_compile(content_hash(event), drawer, event)
+            results = drawer.draw_compiled(compiled)
+            stats = drawer.last_stats
+            return {
+                "results": results.to_dict(),
+                "cached": cached,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+                "stats": {"phases": stats.phases, "counters": stats.counters},
+            }
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _release_abandoned(self, _: Future) -> None:
+        with self._lock:
+            self._abandoned -= 1
+
+    def handle_draw(self, event: Dict) -> Tuple[int, Dict]:
+        if not isinstance(event, dict) or not isinstance(event.get("participants"), list):
+            return 400, {"error": "O corpo deve ser um objeto com a lista 'participants'."}
+
+        try:
+            check_event_shape(event)  # Antes do hash: tipos errados viram 400, não uma exceção na thread
+            drawer = event.get("drawer", self._default_drawer)
+            event = {**event, "drawer": drawer, "options": clean_options(drawer, event.get("options"), self._timeout)}
+        except ValueError as e:
+            return 400, {"error": str(e)}
+
+        with self._lock:
+            if self._abandoned >= self._workers:
+                return 503, {"error": "Todos os workers estão ocupados com sorteios que expiraram, tente novamente mais tarde."}
+
+            if self._queued >= self._max_queue:
+                return 503, {"error": "Fila cheia, tente novamente mais tarde."}
+
+            self._queued += 1
+
+        future: Future = self._executor.submit(self._run, event)
+        try:
+            return 200, future.result(timeout=self._timeout)
+        except FutureTimeoutError:
+            if future.cancel():  # Ainda não tinha começado: sai da fila
+                with self._lock:
+                    self._queued -= 1
+            else:  # Já está rodando: a thread só é liberada quando o sorteio terminar
+                with self._lock:
+                    self._abandoned += 1
+                future.add_done_callback(self._release_abandoned)
+
+            return 504, {"error": f"Sorteio não concluído em {self._timeout}s."}
+        except InfeasibleRestrictionsException as e:
+            return 422, {"error": str(e), "conflict": e.conflict}
+        except InvalidRestrictionsException as e:
+            return 400, {"error": str(e)}
+        except DrawException as e:
+            return 422, {"error": str(e) or type(e).__name__}
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:  # Nunca deixa a conexão sem resposta
+            return 500, {"error": f"Erro interno: {type(e).__name__}: {e}"}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.service", description="Serviço HTTP local de sorteios.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=30, help="Tempo máximo por pedido, em segundos")
+    parser.add_argument("--cache-size", type=int, default=256)
+    args = parser.parse_args(argv)
+
+    service = DrawService(args.host, args.port, args.workers, args.max_queue, args.timeout, args.cache_size)
+    print(f"Servindo sorteios em {service.url}", file=sys.stderr)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
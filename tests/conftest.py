@@ -0,0 +1,33 @@
+from itertools import permutations
+from random import Random
+from typing import Iterator, List, Tuple
+import pytest
+
+
+def random_masks(n: int, density: float, rng: Random) -> List[int]:
+    # allowed[i]: bitmask de quem i pode tirar (ninguém tira a si mesmo)
+    return [sum(1 << j for j in range(n) if j != i and rng.random() < density) for i in range(n)]
+
+
+def incoming(allowed: List[int]) -> List[int]:
+    allowed_in = [0] * len(allowed)
+    for i, mask in enumerate(allowed):
+        for j in range(len(allowed)):
+            if mask >> j & 1:
+                allowed_in[j] |= 1 << i
+
+    return allowed_in
+
+
+def brute_force(allowed: List[int]) -> Iterator[Tuple[int, ...]]:
+    """Todas as permutações que respeitam as máscaras. Só para N pequeno."""
+    n = len(allowed)
+    for perm in permutations(range(n)):
+        if all(allowed[i] >> j & 1 for i, j in enumerate(perm)):
+            yield perm
+
+
+@pytest.fixture
+def instances() -> List[List[int]]:
+    rng = Random(2024)
+    return [random_masks(n, density, rng) for n in range(2, 8) for density in (0.3, 0.5, 0.8) for _ in range(15)]
@@ -0,0 +1,49 @@
+from itertools import permutations
+from random import Random
+from src.drawers import CompiledRestrictions, MatchingDrawer
+from src.drawers.bipartite import hopcroft_karp, random_greedy_matching
+from src.exceptions import NoValidMatchingException
+from conftest import brute_force, incoming
+
+
+def max_matching(allowed):
+    n = len(allowed)
+    return max(sum(allowed[i] >> j & 1 for i, j in enumerate(perm)) for perm in permutations(range(n)))
+
+
+def test_hopcroft_karp_is_maximum(instances):
+    for allowed in instances:
+        match_l = [-1] * len(allowed)
+        match_r = [-1] * len(allowed)
+        assert hopcroft_karp(allowed, match_l, match_r) == max_matching(allowed)
+
+        for u, v in enumerate(match_l):
+            if v != -1:
+                assert allowed[u] >> v & 1
+                assert match_r[v] == u
+
+
+def test_hopcroft_karp_completes_greedy_start(instances):
+    rng = Random(7)
+    for allowed in instances:
+        match_l = [-1] * len(allowed)
+        match_r = [-1] * len(allowed)
+        matched = random_greedy_matching(allowed, match_l, match_r, rng)
+        matched += hopcroft_karp(allowed, match_l, match_r)
+        assert matched == max_matching(allowed)
+
+
+def test_matching_drawer_agrees_with_brute_force(instances):
+    drawer = MatchingDrawer(seed=1)
+    for allowed in instances:
+        names = [f"p{i}" for i in range(len(allowed))]
+        compiled = CompiledRestrictions.from_masks(names, allowed, incoming(allowed))
+        feasible = next(brute_force(allowed), None) is not None
+        try:
+            successors = drawer._draw(compiled)
+        except NoValidMatchingException:
+            assert not feasible
+        else:
+            assert feasible
+            assert sorted(successors) == list(range(len(allowed)))
+            assert all(allowed[i] >> j & 1 for i, j in enumerate(successors))
@@ -0,0 +1,51 @@
+from src.drawers import CompiledRestrictions
+from src.drawers.feasibility import check_feasibility
+from src.exceptions import InfeasibleRestrictionsException
+from conftest import brute_force, incoming
+
+
+def single_cycle(perm) -> bool:
+    cur, length = perm[0], 1
+    while cur != 0:
+        cur, length = perm[cur], length + 1
+
+    return length == len(perm)
+
+
+def compile_masks(allowed):
+    names = [f"p{i}" for i in range(len(allowed))]
+    return CompiledRestrictions.from_masks(names, allowed, incoming(allowed))
+
+
+def test_matches_brute_force(instances):
+    # Sem ciclo único a pré-checagem é exata (Hall): rejeita se e somente se não há sorteio válido
+    for allowed in instances:
+        compiled = compile_masks(allowed)
+        feasible = next(brute_force(allowed), None) is not None
+        try:
+            check_feasibility(compiled)
+        except InfeasibleRestrictionsException as e:
+            assert not feasible
+            givers = [compiled.index[p] for p in e.conflict]
+            receivers = 0
+            for i in givers:
+                receivers |= allowed[i]
+            assert receivers.bit_count() < len(givers)  # O grupo reportado de fato viola Hall
+        else:
+            assert feasible
+
+
+def test_cycle_never_rejects_feasible(instances):
+    # Com ciclo único a checagem é só necessária: nunca pode rejeitar uma instância que tem solução
+    rejected = 0
+    for allowed in instances:
+        compiled = compile_masks(allowed)
+        feasible = any(single_cycle(perm) for perm in brute_force(allowed))
+        try:
+            check_feasibility(compiled, require_cycle=True)
+        except InfeasibleRestrictionsException as e:
+            assert not feasible
+            assert e.conflict
+            rejected += 1
+
+    assert rejected  # As instâncias esparsas precisam exercitar o caminho de rejeição
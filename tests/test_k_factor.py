@@ -0,0 +1,79 @@
+from random import Random
+from src.drawers import DFSDrawer, MatchingDrawer
+from src.drawers.bipartite import random_k_factor
+from src.exceptions import DrawException
+from conftest import brute_force
+
+
+def has_disjoint_rounds(perms, k, used=frozenset(), start=0) -> bool:
+    # Existem k permutações válidas sem nenhum par (doador, sorteado) em comum?
+    if k == 0:
+        return True
+
+    for idx in range(start, len(perms)):
+        pairs = set(enumerate(perms[idx]))
+        if not pairs & used and has_disjoint_rounds(perms, k - 1, used | pairs, idx + 1):
+            return True
+
+    return False
+
+
+def test_random_k_factor_is_regular_and_matches_brute_force(instances):
+    rng = Random(3)
+    for allowed in instances:
+        n = len(allowed)
+        if n > 5:
+            continue
+
+        perms = list(brute_force(allowed))
+        for k in range(1, n):
+            chosen = random_k_factor(allowed, k, rng)
+            if chosen is None:
+                assert not has_disjoint_rounds(perms, k)
+                continue
+
+            assert has_disjoint_rounds(perms, k)
+            assert all(c & ~a == 0 for c, a in zip(chosen, allowed))  # Só arestas permitidas
+            assert all(c.bit_count() == k for c in chosen)
+            assert all(sum(c >> v & 1 for c in chosen) == k for v in range(n))
+
+
+def check_rounds(rounds, blocked, k):
+    assert len(rounds) == k
+    seen = set()
+    for assignment in rounds:
+        assert sorted(assignment.values()) == sorted(assignment)  # Todos tiram e são tirados uma vez
+        for giver, receiver in assignment.items():
+            assert giver != receiver
+            assert receiver not in blocked[giver]
+            assert (giver, receiver) not in seen  # Rodadas disjuntas: nenhum par se repete
+            seen.add((giver, receiver))
+
+
+def test_draw_many_rounds_are_edge_disjoint():
+    rng = Random(11)
+    names = [f"p{i}" for i in range(12)]
+    checked = 0
+    for drawer in (MatchingDrawer(seed=5), DFSDrawer(seed=5)):
+        for _ in range(20):
+            blocked = {p: {p} | {q for q in names if rng.random() < 0.2} for p in names}
+            for k in (1, 2, 3):
+                try:
+                    rounds = drawer.draw_many(names, blocked, k)
+                except DrawException:
+                    continue
+
+                check_rounds(rounds, blocked, k)
+                checked += 1
+                if drawer.requires_cycle:
+                    assert all(len(a.cycles()) == 1 for a in rounds)
+
+    assert checked  # Nem todos os sorteios podem falhar, senão o teste não verifica nada
+
+
+def test_draw_many_uses_every_allowed_pair():
+    # Grafo completo com k = n - 1: a única saída é usar cada par permitido exatamente uma vez
+    names = [f"p{i}" for i in range(6)]
+    blocked = {p: {p} for p in names}
+    rounds = MatchingDrawer(seed=2).draw_many(names, blocked, len(names) - 1)
+    check_rounds(rounds, blocked, len(names) - 1)
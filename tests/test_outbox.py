@@ -0,0 +1,68 @@
+import asyncio
+from src.integration.delivery import DeliveryResult, OutgoingMessage
+from src.integration.outbox import Outbox, deliver_with_outbox
+
+MESSAGES = [OutgoingMessage(f"p{i}", f"55119999900{i:02d}", f"Olá p{i}, você tirou p{(i + 1) % 5}!") for i in range(5)]
+
+
+class FakeClient:
+    """Só o que o send_all usa do AsyncWAHA: registra os envios e responde com o status configurado."""
+
+    def __init__(self, status_code: int = 201):
+        self.status_code = status_code
+        self.sent = []
+
+    async def send_msg(self, phone: str, text: str):
+        self.sent.append(phone)
+        return self.status_code, {}
+
+
+def test_delivered_rows_survive_a_crash(tmp_path):
+    path = str(tmp_path / "outbox.sqlite3")
+    outbox = Outbox(path)
+    outbox.enqueue("d1", "Natal", MESSAGES)
+
+    record = outbox.recorder("d1", batch_size=20)
+    record(DeliveryResult("p0", MESSAGES[0].phone, delivered=True, attempts=1, status_code=201))
+    record(DeliveryResult("p1", MESSAGES[1].phone, delivered=False, attempts=4, status_code=500))
+    record(DeliveryResult("p2", MESSAGES[2].phone, delivered=True, attempts=2, status_code=201))
+    # Queda: sem flush nem close, o que estava só no buffer se perde
+
+    reopened = Outbox(path)
+    assert [m.recipient for m in reopened.pending("d1")] == ["p1", "p3", "p4"]
+    assert reopened.pending_draws() == [("d1", "Natal", 3)]
+    reopened.close()
+
+
+def test_resume_does_not_resend_delivered(tmp_path):
+    path = str(tmp_path / "outbox.sqlite3")
+    outbox = Outbox(path)
+    outbox.enqueue("d1", "Natal", MESSAGES)
+    outbox.mark("d1", [DeliveryResult("p0", MESSAGES[0].phone, delivered=True, attempts=1, status_code=201)])
+    outbox.close()
+
+    reopened = Outbox(path)
+    client = FakeClient()
+    results = asyncio.run(deliver_with_outbox(reopened, "d1", client, rate=1000))
+
+    assert sorted(client.sent) == sorted(m.phone for m in MESSAGES[1:])
+    assert all(r.delivered for r in results)
+    assert reopened.pending("d1") == []
+    assert reopened.pending_draws() == []
+
+    # Retomar de novo (ou registrar as mesmas mensagens outra vez) não envia nada
+    client.sent.clear()
+    asyncio.run(deliver_with_outbox(reopened, "d1", client, messages=MESSAGES, rate=1000))
+    assert client.sent == []
+    reopened.close()
+
+
+def test_failed_rows_stay_pending(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+    client = FakeClient(status_code=422)
+    results = asyncio.run(deliver_with_outbox(outbox, "d1", client, messages=MESSAGES, rate=1000))
+
+    assert not any(r.delivered for r in results)
+    assert len(client.sent) == len(MESSAGES)  # 4xx definitivo: uma tentativa só
+    assert len(outbox.pending("d1")) == len(MESSAGES)
+    outbox.close()